@@ -1,108 +1,214 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from app.core.security import get_current_admin_user
-from app.services.ride_service import RideService
-from app.services.payment_service import PaymentService
 from app.services.auth_service import AuthService
+from app.core.database import Database
+from app.core.indexes import IndexManager
+from app.services.distance_cache import DistanceCache
+from app.services.stats_service import StatsService
+from app.services.user_import_service import UserImportService
+from app.models.user import User, UserAdminUpdate
+from app.core.config import settings
+from app.core.export import projection_for, stream_csv, stream_ndjson
+from app.core.pagination import date_range, paginate
+from datetime import datetime
 from typing import Dict, Any, List, Optional
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 500
+
+async def _list_page(
+    collection: str,
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    projection: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    query = {**query, **date_range(created_from, created_to)}
+    try:
+        return await paginate(Database.db[collection], query, limit, cursor, projection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/users")
 async def get_all_users(
     current_user: Dict[str, Any] = Depends(get_current_admin_user),
-    skip: int = 0,
-    limit: int = 100
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
 ):
-    users = await Auth.db["users"].find().skip(skip).limit(limit).to_list(length=None)
+    query = {}
+    if is_active is not None:
+        query["is_active"] = is_active
     
-    # Convert ObjectId to string
-    for user in users:
-        user["_id"] = str(user["_id"])
-        # Remove password hash
-        if "password" in user:
-            del user["password"]
+    # Never return password hashes
+    return await _list_page("users", query, limit, cursor, created_from, created_to, projection={"password": 0})
+
+@router.patch("/users/{user_id}", response_model=User)
+async def update_user(
+    user_id: str,
+    updates: UserAdminUpdate,
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    try:
+        user = await AuthService.update_user(user_id, updates)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     
-    return users
+    return user
+
+@router.post("/users/import")
+async def import_users(
+    request: Request,
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$"),
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """
+    Create users in bulk from a streamed CSV (with a header row) or NDJSON
+    body with email, phone, full_name and password for each user
+    The format defaults to CSV for a text/csv body and NDJSON otherwise
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    
+    lines = UserImportService.iter_lines(request.stream())
+    return await UserImportService.import_users(UserImportService.iter_rows(lines, format))
 
 @router.get("/rides")
 async def get_all_rides(
     current_user: Dict[str, Any] = Depends(get_current_admin_user),
-    skip: int = 0,
-    limit: int = 100,
-    status: Optional[str] = None
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
 ):
     # Build query
     query = {}
     if status:
         query["status"] = status
     
-    rides = await Database.db["rides"].find(query).skip(skip).limit(limit).to_list(length=None)
-    
-    # Convert ObjectId to string
-    for ride in rides:
-        ride["_id"] = str(ride["_id"])
-    
-    return rides
+    return await _list_page("rides", query, limit, cursor, created_from, created_to)
 
 @router.get("/payments")
 async def get_all_payments(
     current_user: Dict[str, Any] = Depends(get_current_admin_user),
-    skip: int = 0,
-    limit: int = 100,
-    status: Optional[str] = None
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
 ):
     # Build query
     query = {}
     if status:
         query["status"] = status
     
-    payments = await Database.db["payments"].find(query).skip(skip).limit(limit).to_list(length=None)
-    
-    # Convert ObjectId to string
-    for payment in payments:
-        payment["_id"] = str(payment["_id"])
-    
-    return payments
+    return await _list_page("payments", query, limit, cursor, created_from, created_to)
 
 @router.get("/penalties")
 async def get_all_penalties(
     current_user: Dict[str, Any] = Depends(get_current_admin_user),
-    skip: int = 0,
-    limit: int = 100,
-    status: Optional[str] = None
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
 ):
     # Build query
     query = {}
     if status:
         query["status"] = status
     
-    penalties = await Database.db["penalties"].find(query).skip(skip).limit(limit).to_list(length=None)
+    return await _list_page("penalties", query, limit, cursor, created_from, created_to)
+
+# Collections that can be exported, with the CSV columns used when no
+# fields are selected
+EXPORT_FIELDS = {
+    "rides": [
+        "_id", "user_id", "bike_id", "status", "start_time", "end_time",
+        "distance_km", "fare_amount", "created_at"
+    ],
+    "payments": [
+        "_id", "ride_id", "user_id", "amount", "payment_method", "status",
+        "transaction_id", "payment_time", "created_at"
+    ],
+    "penalties": [
+        "_id", "user_id", "ride_id", "penalty_type", "amount", "status",
+        "payment_id", "created_at"
+    ],
+    "incidents": [
+        "_id", "bike_id", "ride_id", "user_id", "incident_type", "description",
+        "location.coordinates", "created_at"
+    ],
+}
+
+@router.get("/export/{collection}")
+async def export_collection(
+    collection: str,
+    format: str = Query("ndjson", regex="^(csv|ndjson)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, dotted for embedded ones"),
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """
+    Stream a collection as NDJSON or CSV, oldest first
+    The cursor is read in batches of EXPORT_BATCH_SIZE, so memory use does
+    not grow with the number of rows exported
+    """
+    if collection not in EXPORT_FIELDS:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    
+    query = date_range(created_from, created_to)
+    if status:
+        query["status"] = status
     
-    # Convert ObjectId to string
-    for penalty in penalties:
-        penalty["_id"] = str(penalty["_id"])
+    try:
+        projection = projection_for(selected)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return penalties
+    cursor = Database.db[collection].find(
+        query,
+        projection=projection,
+        sort=[("created_at", 1), ("_id", 1)],
+        batch_size=settings.EXPORT_BATCH_SIZE
+    )
+    
+    filename = f"{collection}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{format}"
+    if format == "csv":
+        body = stream_csv(cursor, selected or EXPORT_FIELDS[collection])
+        media_type = "text/csv"
+    else:
+        body = stream_ndjson(cursor)
+        media_type = "application/x-ndjson"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.get("/dashboard")
 async def get_dashboard_stats(current_user: Dict[str, Any] = Depends(get_current_admin_user)):
-    # Get counts
-    user_count = await Database.db["users"].count_documents({})
-    active_rides = await Database.db["rides"].count_documents({"status": "active"})
-    completed_rides = await Database.db["rides"].count_documents({"status": "completed"})
-    total_revenue = await Database.db["payments"].aggregate([
-        {"$match": {"status": "completed"}},
-        {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-    ]).to_list(length=1)
-    
-    # Calculate revenue
-    revenue = 0
-    if total_revenue:
-        revenue = total_revenue[0].get("total", 0)
-    
-    return {
-        "user_count": user_count,
-        "active_rides": active_rides,
-        "completed_rides": completed_rides,
-        "total_revenue": revenue
-    }
+    return await StatsService.get_dashboard()
+
+@router.get("/distance-cache")
+async def get_distance_cache_stats(current_user: Dict[str, Any] = Depends(get_current_admin_user)):
+    return DistanceCache.stats()
+
+@router.get("/indexes")
+async def get_index_drift(current_user: Dict[str, Any] = Depends(get_current_admin_user)):
+    return await IndexManager.drift_report(Database.db)
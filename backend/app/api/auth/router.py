@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from app.models.user import UserCreate, UserLogin, TokenResponse, User
 from app.services.auth_service import AuthService
-from app.core.security import get_current_active_user
+from app.core.security import get_current_user_profile
+from app.core.rate_limit import RateLimitExceeded
 from typing import Dict, Any
 
 router = APIRouter()
@@ -15,8 +16,16 @@ async def register(user_data: UserCreate):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login", response_model=TokenResponse)
-async def login(user_data: UserLogin):
-    result = await AuthService.login(user_data)
+async def login(user_data: UserLogin, request: Request):
+    client_ip = request.client.host if request.client else None
+    try:
+        result = await AuthService.login(user_data, client_ip)
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
     if not result:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -26,7 +35,7 @@ async def login(user_data: UserLogin):
     return result
 
 @router.get("/me", response_model=User)
-async def get_current_user(current_user: Dict[str, Any] = Depends(get_current_active_user)):
+async def get_current_user(current_user: Dict[str, Any] = Depends(get_current_user_profile)):
     return current_user
 
 @router.post("/register", response_model=User)
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.document import DocumentVerifyRequest, DocumentVerifyResponse
+from fastapi import APIRouter, HTTPException, Depends, status
+from app.models.document import DocumentVerifyRequest, VerificationJobResponse
 from app.services.digilocker_service import DigiLockerService
 from app.core.security import get_current_active_user
 from typing import Dict, Any
 
 router = APIRouter()
 
-@router.post("/verify", response_model=DocumentVerifyResponse)
+def _job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+
+@router.post("/verify", response_model=VerificationJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def verify_document(
     request: DocumentVerifyRequest,
     current_user: Dict[str, Any] = Depends(get_current_active_user)
@@ -15,27 +26,24 @@ async def verify_document(
     if request.user_id != current_user["_id"]:
         raise HTTPException(status_code=403, detail="Not authorized to verify documents for this user")
     
-    result = await DigiLockerService.verify_document(
+    job = await DigiLockerService.enqueue_verification(
         request.user_id,
         request.doc_type,
+        request.doc_id,
         request.doc_data
     )
     
-    return result
+    return _job_response(job)
 
-@router.post("/verify", response_model=DocumentVerifyResponse)
-async def verify_document(
-    request: DocumentVerifyRequest,
+@router.get("/verify/{job_id}", response_model=VerificationJobResponse)
+async def get_verification_status(
+    job_id: str,
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    # Ensure the user can only verify their own documents
-    if request.user_id != current_user["_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to verify documents for this user")
+    job = await DigiLockerService.get_verification_job(job_id)
     
-    result = await DigiLockerService.verify_document(
-        request.user_id,
-        request.doc_type,
-        request.doc_data
-    )
+    # Users can only see their own verification jobs
+    if not job or (job["user_id"] != current_user["_id"] and not current_user.get("is_admin", False)):
+        raise HTTPException(status_code=404, detail="Verification job not found")
     
-    return result
\ No newline at end of file
+    return _job_response(job)
@@ -1,16 +1,34 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from app.services.geofencing_service import GeofencingService
+from app.services.occupancy_service import OccupancyService
 from app.core.security import get_current_active_user, get_current_admin_user
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 router = APIRouter()
 
+MAX_BATCH_POINTS = 100000
+
 class ParkingZone(BaseModel):
     name: str
     geometry: Dict[str, Any]
     properties: Dict[str, Any] = {}
 
+class BatchValidateRequest(BaseModel):
+    points: List[List[float]]
+
+    @validator("points")
+    def validate_points(cls, points):
+        if len(points) > MAX_BATCH_POINTS:
+            raise ValueError(f"At most {MAX_BATCH_POINTS} points can be validated per request")
+        for point in points:
+            if len(point) != 2:
+                raise ValueError("Each point must be a [lng, lat] pair")
+        return points
+
+class BatchValidateResponse(BaseModel):
+    zone_ids: List[Optional[str]]
+
 @router.get("/validate")
 async def validate_parking_location(
     lat: float = Query(..., description="Latitude"),
@@ -20,6 +38,14 @@ async def validate_parking_location(
     result = await GeofencingService.validate_parking_location(lat, lng)
     return result
 
+@router.post("/validate/batch", response_model=BatchValidateResponse)
+async def validate_parking_locations(
+    request: BatchValidateRequest,
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    zone_ids = await GeofencingService.classify_points(request.points)
+    return {"zone_ids": zone_ids}
+
 @router.get("/zones")
 async def get_parking_zones(current_user: Dict[str, Any] = Depends(get_current_active_user)):
     zones = await GeofencingService.get_all_parking_zones()
@@ -38,3 +64,22 @@ async def create_parking_zone(
         return zone
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/occupancy")
+async def get_zone_occupancy(
+    full_only: bool = Query(False, description="Only return zones at capacity"),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    return await OccupancyService.get_all_occupancy(full_only=full_only)
+
+@router.get("/zones/{zone_id}/occupancy")
+async def get_single_zone_occupancy(
+    zone_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    occupancy = await OccupancyService.get_zone_occupancy(zone_id)
+    
+    if not occupancy:
+        raise HTTPException(status_code=404, detail="Parking zone not found")
+    
+    return occupancy
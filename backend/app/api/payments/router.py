@@ -1,8 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.payment import PaymentCreate, Payment, PaymentProcess
+from fastapi import APIRouter, HTTPException, Depends, Query
+from app.models.payment import PaymentCreate, Payment, PaymentPage, PaymentProcess
 from app.services.payment_service import PaymentService
+from app.core.errors import NotFoundError, PermissionDeniedError
 from app.core.security import get_current_active_user
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional
 
 router = APIRouter()
 
@@ -21,10 +22,16 @@ async def create_payment(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("", response_model=List[Payment])
-async def get_user_payments(current_user: Dict[str, Any] = Depends(get_current_active_user)):
-    payments = await PaymentService.get_user_payments(current_user["_id"])
-    return payments
+@router.get("", response_model=PaymentPage)
+async def get_user_payments(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    try:
+        return await PaymentService.get_user_payments(current_user["_id"], limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{payment_id}", response_model=Payment)
 async def get_payment(
@@ -48,21 +55,19 @@ async def process_online_payment(
     data: PaymentProcess,
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    payment = await PaymentService.get_payment(payment_id)
-    
-    if not payment:
-        raise HTTPException(status_code=404, detail="Payment not found")
-    
-    # Ensure the user can only process their own payments
-    if payment["user_id"] != current_user["_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to process this payment")
-    
+    # Users can only process their own payments; the service checks
+    # ownership as part of the update
     try:
         updated_payment = await PaymentService.process_online_payment(
             payment_id,
-            data.payment_details or {}
+            data.payment_details or {},
+            user_id=current_user["_id"]
         )
         return updated_payment
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PermissionDeniedError as e:
+        raise HTTPException(status_code=403, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -71,11 +76,6 @@ async def complete_cash_payment(
     payment_id: str,
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    payment = await PaymentService.get_payment(payment_id)
-    
-    if not payment:
-        raise HTTPException(status_code=404, detail="Payment not found")
-    
     # Only admins can mark cash payments as completed
     if not current_user.get("is_admin", False):
         raise HTTPException(status_code=403, detail="Not authorized to complete cash payments")
@@ -83,5 +83,7 @@ async def complete_cash_payment(
     try:
         updated_payment = await PaymentService.complete_cash_payment(payment_id)
         return updated_payment
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
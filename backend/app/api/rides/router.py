@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.ride import RideCreate, Ride, RideStart, RideComplete
+from fastapi import APIRouter, HTTPException, Depends, Query
+from app.models.ride import RideCreate, Ride, RidePage, RideStart, RideComplete
 from app.services.ride_service import RideService
+from app.services.ride_trace_service import RideTraceService
+from app.core.errors import NotFoundError, PermissionDeniedError
 from app.core.security import get_current_active_user
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional
 
 router = APIRouter()
 
@@ -21,10 +23,16 @@ async def create_ride(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("", response_model=List[Ride])
-async def get_user_rides(current_user: Dict[str, Any] = Depends(get_current_active_user)):
-    rides = await RideService.get_user_rides(current_user["_id"])
-    return rides
+@router.get("", response_model=RidePage)
+async def get_user_rides(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    try:
+        return await RideService.get_user_rides(current_user["_id"], limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{ride_id}", response_model=Ride)
 async def get_ride(
@@ -42,10 +50,10 @@ async def get_ride(
     
     return ride
 
-@router.post("/{ride_id}/start", response_model=Ride)
-async def start_ride(
+@router.get("/{ride_id}/trace")
+async def get_ride_trace(
     ride_id: str,
-    data: RideStart,
+    tolerance_m: float = Query(0, ge=0, description="Simplification tolerance in meters"),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     ride = await RideService.get_ride(ride_id)
@@ -53,17 +61,37 @@ async def start_ride(
     if not ride:
         raise HTTPException(status_code=404, detail="Ride not found")
     
-    # Ensure the user can only start their own rides
-    if ride["user_id"] != current_user["_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to start this ride")
+    # Ensure the user can only view their own rides
+    if ride["user_id"] != current_user["_id"] and not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Not authorized to view this ride")
+    
+    trace = await RideTraceService.get_trace(ride_id, tolerance_m)
     
+    if not trace:
+        raise HTTPException(status_code=404, detail="No trace recorded for this ride")
+    
+    return trace
+
+@router.post("/{ride_id}/start", response_model=Ride)
+async def start_ride(
+    ride_id: str,
+    data: RideStart,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    # Users can only start their own rides; the service checks ownership
+    # as part of the transition
     try:
         updated_ride = await RideService.start_ride(
             ride_id,
             data.bike_id,
-            data.source_image_url
+            data.source_image_url,
+            user_id=current_user["_id"]
         )
         return updated_ride
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PermissionDeniedError as e:
+        raise HTTPException(status_code=403, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -73,22 +101,20 @@ async def complete_ride(
     data: RideComplete,
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    ride = await RideService.get_ride(ride_id)
-    
-    if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found")
-    
-    # Ensure the user can only complete their own rides
-    if ride["user_id"] != current_user["_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to complete this ride")
-    
+    # Users can only complete their own rides; the service checks ownership
+    # as part of the transition
     try:
         updated_ride = await RideService.complete_ride(
             ride_id,
             data.destination_coordinates,
-            data.destination_image_url
+            data.destination_image_url,
+            user_id=current_user["_id"]
         )
         return updated_ride
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PermissionDeniedError as e:
+        raise HTTPException(status_code=403, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -97,17 +123,14 @@ async def cancel_ride(
     ride_id: str,
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    ride = await RideService.get_ride(ride_id)
-    
-    if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found")
-    
-    # Ensure the user can only cancel their own rides
-    if ride["user_id"] != current_user["_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to cancel this ride")
-    
+    # Users can only cancel their own rides; the service checks ownership
+    # as part of the transition
     try:
-        updated_ride = await RideService.cancel_ride(ride_id)
+        updated_ride = await RideService.cancel_ride(ride_id, user_id=current_user["_id"])
         return updated_ride
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PermissionDeniedError as e:
+        raise HTTPException(status_code=403, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
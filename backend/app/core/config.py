@@ -11,6 +11,33 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+    # Login admission control: attempts per account and per client IP within
+    # a sliding window ("memory" per process, "mongo" shared by all workers),
+    # and password verifications in flight (0 = 4 per hashing process)
+    LOGIN_RATE_LIMIT_BACKEND: str = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory")
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: float = float(os.getenv("LOGIN_RATE_LIMIT_WINDOW_SECONDS", "300"))
+    LOGIN_RATE_LIMIT_PER_ACCOUNT: int = int(os.getenv("LOGIN_RATE_LIMIT_PER_ACCOUNT", "10"))
+    LOGIN_RATE_LIMIT_PER_IP: int = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "100"))
+    LOGIN_MAX_CONCURRENT_VERIFICATIONS: int = int(os.getenv("LOGIN_MAX_CONCURRENT_VERIFICATIONS", "0"))
+    # Admin bulk user import: rows written per insert_many, rows per upload
+    USER_IMPORT_CHUNK_SIZE: int = int(os.getenv("USER_IMPORT_CHUNK_SIZE", "500"))
+    USER_IMPORT_MAX_ROWS: int = int(os.getenv("USER_IMPORT_MAX_ROWS", "100000"))
+    # Seconds between recounts of the admin dashboard counters; 0 recounts
+    # only at startup
+    STATS_RECONCILE_INTERVAL_SECONDS: float = float(os.getenv("STATS_RECONCILE_INTERVAL_SECONDS", "3600"))
+    # Documents fetched per cursor batch by the admin exports
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    # Authenticated user cache; entries are invalidated when a user changes
+    # in this process, other workers see the change within the TTL
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    # Verified access tokens kept so repeat requests skip signature checks
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+    # Carry is_active/is_admin in access tokens and skip the user lookup;
+    # deactivating a user then only takes effect when their token expires
+    AUTH_CLAIMS_IN_TOKEN: bool = os.getenv("AUTH_CLAIMS_IN_TOKEN", "false").lower() == "true"
+    # bcrypt worker processes; 0 uses all cores but one
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
     
     # MongoDB
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
@@ -19,6 +46,66 @@ class Settings(BaseSettings):
     # External APIs
     GOOGLE_MAPS_API_KEY: str = os.getenv("GOOGLE_MAPS_API_KEY", "")
     DIGILOCKER_API_KEY: str = os.getenv("DIGILOCKER_API_KEY", "")
+    # Repeat submissions of the same document within this window reuse the
+    # earlier verification instead of calling DigiLocker again
+    DIGILOCKER_CACHE_TTL_SECONDS: int = int(os.getenv("DIGILOCKER_CACHE_TTL_SECONDS", "86400"))
+    DIGILOCKER_CACHE_MAX_SIZE: int = int(os.getenv("DIGILOCKER_CACHE_MAX_SIZE", "10000"))
+    # "google" uses the Distance Matrix API, "graph" routes on the local road
+    # graph stored under ROAD_GRAPH_PATH (see app/services/road_graph.py)
+    DISTANCE_BACKEND: str = os.getenv("DISTANCE_BACKEND", "google")
+    ROAD_GRAPH_PATH: str = os.getenv("ROAD_GRAPH_PATH", "data/road_graph")
+    # How long a missing graph is remembered before looking for it again
+    ROAD_GRAPH_RETRY_SECONDS: float = float(os.getenv("ROAD_GRAPH_RETRY_SECONDS", "60"))
+    # Road distance / straight-line distance ratio used when routing is unavailable
+    ROAD_DISTANCE_FACTOR: float = float(os.getenv("ROAD_DISTANCE_FACTOR", "1.3"))
+    # Distance Matrix cache: decimal places kept when keying coordinates (4 is ~11 m)
+    DISTANCE_CACHE_PRECISION: int = int(os.getenv("DISTANCE_CACHE_PRECISION", "4"))
+    DISTANCE_CACHE_TTL_SECONDS: int = int(os.getenv("DISTANCE_CACHE_TTL_SECONDS", "604800"))
+    DISTANCE_CACHE_MAX_SIZE: int = int(os.getenv("DISTANCE_CACHE_MAX_SIZE", "10000"))
+    # Window for coalescing concurrent Distance Matrix lookups; 0 disables batching
+    DISTANCE_BATCH_WINDOW_MS: float = float(os.getenv("DISTANCE_BATCH_WINDOW_MS", "20"))
+    # Unrelated lookups are packed into one request while the billed elements
+    # (origins x destinations) stay within this multiple of the lookups; 1
+    # only combines lookups sharing an origin or destination
+    DISTANCE_BATCH_MAX_ELEMENT_RATIO: float = float(os.getenv("DISTANCE_BATCH_MAX_ELEMENT_RATIO", "2"))
+    
+    # Geofencing
+    # "memory" checks points against the in-process zone index,
+    # "mongo" runs $geoIntersects against the parking_zones 2dsphere index
+    GEOFENCE_BACKEND: str = os.getenv("GEOFENCE_BACKEND", "memory")
+    # Lookup grid cell size in degrees (~110 m); 0 disables the grid
+    GEOFENCE_GRID_CELL_SIZE: float = float(os.getenv("GEOFENCE_GRID_CELL_SIZE", "0.001"))
+    GEOFENCE_GRID_MAX_CELLS: int = int(os.getenv("GEOFENCE_GRID_MAX_CELLS", "2000000"))
+    # Seconds between checks for zones created by other workers; 0 disables
+    ZONE_INDEX_REFRESH_SECONDS: float = float(os.getenv("ZONE_INDEX_REFRESH_SECONDS", "30"))
+    # Treat parking in a zone at capacity as invalid parking
+    GEOFENCE_REJECT_FULL_ZONES: bool = os.getenv("GEOFENCE_REJECT_FULL_ZONES", "false").lower() == "true"
+    # Seconds between recounts of parked bikes per zone; 0 disables
+    OCCUPANCY_RECONCILE_INTERVAL_SECONDS: float = float(os.getenv("OCCUPANCY_RECONCILE_INTERVAL_SECONDS", "300"))
+    
+    # Ride GPS traces: steps shorter than RIDE_TRACE_MIN_STEP_M are treated as
+    # jitter, stored traces are simplified to RIDE_TRACE_TOLERANCE_M
+    RIDE_TRACE_MIN_STEP_M: float = float(os.getenv("RIDE_TRACE_MIN_STEP_M", "5"))
+    RIDE_TRACE_TOLERANCE_M: float = float(os.getenv("RIDE_TRACE_TOLERANCE_M", "5"))
+    # Telemetry whose device timestamp is further than this from the server
+    # clock is dropped
+    RIDE_TRACE_MAX_CLOCK_SKEW_SECONDS: float = float(os.getenv("RIDE_TRACE_MAX_CLOCK_SKEW_SECONDS", "300"))
+    
+    # Outbound HTTP (Google Maps, DigiLocker)
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "3"))
+    HTTP_POOL_SIZE: int = int(os.getenv("HTTP_POOL_SIZE", "100"))
+    HTTP_POOL_SIZE_PER_HOST: int = int(os.getenv("HTTP_POOL_SIZE_PER_HOST", "20"))
+    HTTP_KEEPALIVE_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+    
+    # Background jobs (DigiLocker verification); failed attempts are retried
+    # after JOB_RETRY_BASE_SECONDS * 2^(attempt - 1), capped at JOB_RETRY_MAX_SECONDS
+    JOB_WORKER_CONCURRENCY: int = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_RETRY_BASE_SECONDS: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+    JOB_RETRY_MAX_SECONDS: float = float(os.getenv("JOB_RETRY_MAX_SECONDS", "300"))
+    JOB_POLL_INTERVAL_SECONDS: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "120"))
     
     # MQTT Settings
     MQTT_BROKER: str = os.getenv("MQTT_BROKER", "mqtt.example.com")
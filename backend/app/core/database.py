@@ -1,6 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure
 from app.core.config import settings
+from app.core.indexes import IndexManager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,9 @@ class Database:
             # Verify connection
             await cls.client.admin.command('ping')
             logger.info("Connected to MongoDB successfully")
+            # Build any declared index the database is missing without
+            # holding up startup
+            IndexManager.start_build(cls.db)
         except ConnectionFailure:
             logger.error("Failed to connect to MongoDB")
             raise
@@ -0,0 +1,5 @@
+class NotFoundError(ValueError):
+    """The requested document does not exist; routers answer 404"""
+
+class PermissionDeniedError(ValueError):
+    """The document belongs to someone else; routers answer 403"""
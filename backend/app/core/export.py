@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional
+from bson import ObjectId
+
+# Rows serialized per chunk written to the response
+ROWS_PER_CHUNK = 100
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _field_value(document: Dict[str, Any], field: str) -> Any:
+    # Dotted fields reach into embedded documents, e.g. "source.coordinates"
+    value: Any = document
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (ObjectId, datetime, Enum)):
+        return _json_default(value)
+    return value
+
+async def stream_ndjson(cursor) -> AsyncIterator[bytes]:
+    """
+    One JSON document per line, written in chunks as the cursor yields them
+    The cursor is closed when the stream ends, including when the client
+    disconnects part way
+    """
+    try:
+        lines: List[str] = []
+        async for document in cursor:
+            lines.append(json.dumps(document, default=_json_default))
+            if len(lines) >= ROWS_PER_CHUNK:
+                yield ("\n".join(lines) + "\n").encode()
+                lines = []
+        if lines:
+            yield ("\n".join(lines) + "\n").encode()
+    finally:
+        await cursor.close()
+
+async def stream_csv(cursor, fields: List[str]) -> AsyncIterator[bytes]:
+    """CSV with a header row of the selected fields, written in chunks"""
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+
+        rows = 0
+        async for document in cursor:
+            writer.writerow([_csv_cell(_field_value(document, field)) for field in fields])
+            rows += 1
+            if rows % ROWS_PER_CHUNK == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    finally:
+        await cursor.close()
+
+def projection_for(fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+    """
+    Mongo projection returning only the selected fields
+    Raises ValueError for fields MongoDB would reject, so the request fails
+    before any of the response is sent
+    """
+    if not fields:
+        return None
+
+    for field in fields:
+        if field.startswith("$") or "" in field.split("."):
+            raise ValueError(f"Invalid field: {field}")
+
+    # A field and a path inside it ("source" and "source.type") collide
+    ordered = sorted(set(fields))
+    for parent, child in zip(ordered, ordered[1:]):
+        if child.startswith(parent + "."):
+            raise ValueError(f"Fields {parent} and {child} overlap")
+
+    return {field: 1 for field in fields}
@@ -0,0 +1,141 @@
+import math
+from typing import List
+import numpy as np
+
+# Mean earth radius (IUGG) used by the spherical haversine formula
+EARTH_RADIUS_M = 6371008.8
+
+# WGS-84 ellipsoid used by Vincenty's formula
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+def haversine_m(lng1: float, lat1: float, lng2: float, lat2: float) -> float:
+    """Great-circle distance in meters between two points on a sphere"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def haversine_m_vec(lng1, lat1, lng2, lat2) -> np.ndarray:
+    """
+    Vectorized haversine distance in meters
+    Accepts scalars or NumPy arrays that broadcast against each other
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.asarray(lng2) - np.asarray(lng1))
+
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+def vincenty_m(
+    lng1: float,
+    lat1: float,
+    lng2: float,
+    lat2: float,
+    max_iterations: int = 200,
+    tolerance: float = 1e-12
+) -> float:
+    """
+    Ellipsoidal (WGS-84) distance in meters using Vincenty's inverse formula
+    Falls back to haversine for nearly antipodal points where it does not converge
+    """
+    if lng1 == lng2 and lat1 == lat2:
+        return 0.0
+
+    u1 = math.atan((1 - WGS84_F) * math.tan(math.radians(lat1)))
+    u2 = math.atan((1 - WGS84_F) * math.tan(math.radians(lat2)))
+    big_l = math.radians(lng2 - lng1)
+    sin_u1, cos_u1 = math.sin(u1), math.cos(u1)
+    sin_u2, cos_u2 = math.sin(u2), math.cos(u2)
+
+    lam = big_l
+    for _ in range(max_iterations):
+        sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+        sin_sigma = math.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        if sin_sigma == 0:
+            return 0.0
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = math.atan2(sin_sigma, cos_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lam / sin_sigma
+        cos2_alpha = 1 - sin_alpha ** 2
+        # Both points on the equator
+        cos_2sigma_m = cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha if cos2_alpha != 0 else 0.0
+        c = WGS84_F / 16 * cos2_alpha * (4 + WGS84_F * (4 - 3 * cos2_alpha))
+        lam_prev = lam
+        lam = big_l + (1 - c) * WGS84_F * sin_alpha * (
+            sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+        )
+        if abs(lam - lam_prev) < tolerance:
+            break
+    else:
+        return haversine_m(lng1, lat1, lng2, lat2)
+
+    u_sq = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = big_b * sin_sigma * (
+        cos_2sigma_m + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+        )
+    )
+
+    return WGS84_B * big_a * (sigma - delta_sigma)
+
+def distance_m(coords_a: List[float], coords_b: List[float]) -> float:
+    """Haversine distance in meters between two [lng, lat] coordinate pairs"""
+    return haversine_m(coords_a[0], coords_a[1], coords_b[0], coords_b[1])
+
+def project_local(coordinates) -> np.ndarray:
+    """
+    Project [lng, lat] coordinates to planar meters around their mean latitude
+    Equirectangular approximation, accurate enough for city-scale traces
+    """
+    coords = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+    lat0 = np.radians(coords[:, 1].mean()) if len(coords) else 0.0
+    meters_per_degree = np.radians(1) * EARTH_RADIUS_M
+    return np.column_stack((
+        coords[:, 0] * meters_per_degree * np.cos(lat0),
+        coords[:, 1] * meters_per_degree
+    ))
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas-Peucker line simplification on planar points
+    Returns a boolean mask of the points to keep; endpoints are always kept
+    """
+    count = len(points)
+    keep = np.zeros(count, dtype=bool)
+    if count <= 2:
+        keep[:] = True
+        return keep
+
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return keep
@@ -0,0 +1,68 @@
+import aiohttp
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HTTPClient:
+    """
+    Shared non-blocking HTTP client for calls to external APIs.
+    One pooled session is opened at startup so connections are kept alive
+    and reused across requests instead of blocking the event loop.
+    """
+    session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    async def open(cls):
+        if cls.session is not None and not cls.session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_SIZE,
+            limit_per_host=settings.HTTP_POOL_SIZE_PER_HOST,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_SECONDS
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=settings.HTTP_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+        )
+        cls.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        logger.info("HTTP client session opened")
+
+    @classmethod
+    async def close(cls):
+        if cls.session is not None and not cls.session.closed:
+            await cls.session.close()
+            logger.info("HTTP client session closed")
+        cls.session = None
+
+    @classmethod
+    async def get_json(
+        cls,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Any]:
+        """GET a JSON resource; returns (status code, decoded body)"""
+        return await cls._request("GET", url, params=params, headers=headers)
+
+    @classmethod
+    async def post_json(
+        cls,
+        url: str,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Any]:
+        """POST a JSON body; returns (status code, decoded body)"""
+        return await cls._request("POST", url, json=json, headers=headers)
+
+    @classmethod
+    async def _request(cls, method: str, url: str, **kwargs) -> Tuple[int, Any]:
+        # Scripts and workers that never ran the startup hook get a session lazily
+        if cls.session is None or cls.session.closed:
+            await cls.open()
+
+        async with cls.session.request(method, url, **kwargs) as response:
+            data = await response.json(content_type=None)
+            return response.status, data
@@ -0,0 +1,163 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Every index the services rely on, by collection. Names are left to
+# MongoDB's defaults (e.g. "email_1") so indexes created elsewhere, such
+# as by init_db.py, are recognised rather than duplicated. Admin lists and
+# user histories page on (created_at, _id), optionally after an equality
+# filter such as status or user_id.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("is_active", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "rides": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("bike_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "payments": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "penalties": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "incidents": [
+        IndexModel([("bike_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "bikes": [
+        IndexModel([("location", GEOSPHERE)]),
+    ],
+    "parking_zones": [
+        IndexModel([("geometry", GEOSPHERE)]),
+    ],
+    # Restores a bike's last zone for bikes tracked before current_zone_id
+    # was stored; the unique key drops events recorded twice (events from
+    # before ts was stored are left out of it)
+    "zone_events": [
+        IndexModel([("bike_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel(
+            [("bike_id", ASCENDING), ("ts", ASCENDING), ("event", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"ts": {"$exists": True}}
+        ),
+    ],
+    # MongoDB expires shared Distance Matrix results after the cache TTL
+    "distance_cache": [
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=settings.DISTANCE_CACHE_TTL_SECONDS),
+    ],
+    # pending_key is only present on queued or running jobs with a
+    # dedupe_key, so at most one of them exists per key
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)]),
+        IndexModel([("dedupe_key", ASCENDING), ("status", ASCENDING)]),
+        IndexModel(
+            [("type", ASCENDING), ("user_id", ASCENDING), ("pending_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"pending_key": {"$exists": True}}
+        ),
+    ],
+    "rate_limits": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+# Index options that change behaviour and therefore count as drift
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+class IndexManager:
+    """
+    Builds the indexes declared in INDEXES and reports drift between the
+    declaration and what the database actually has.
+    """
+    build_task: Optional[asyncio.Task] = None
+    build_errors: Dict[str, str] = {}
+
+    @classmethod
+    def start_build(cls, db):
+        """Build missing indexes in a background task so startup does not wait on them"""
+        cls.build_task = asyncio.ensure_future(cls.ensure_indexes(db))
+
+    @classmethod
+    async def ensure_indexes(cls, db):
+        """Create missing indexes and update TTLs that changed"""
+        cls.build_errors = {}
+        for collection, indexes in INDEXES.items():
+            try:
+                drift = await cls._collection_drift(db, collection, indexes)
+                missing = [index for index in indexes if index.document["name"] in drift["missing"]]
+                if missing:
+                    await db[collection].create_indexes(missing)
+                    logger.info(f"Created indexes on {collection}: {', '.join(drift['missing'])}")
+
+                for name, change in drift["changed"].items():
+                    if set(change) == {"expireAfterSeconds"}:
+                        await db.command(
+                            "collMod",
+                            collection,
+                            index={"name": name, "expireAfterSeconds": change["expireAfterSeconds"]["declared"]}
+                        )
+                        logger.info(f"Updated TTL of {collection}.{name}")
+                    else:
+                        logger.warning(f"Index {collection}.{name} differs from its declaration: {change}")
+            except PyMongoError as e:
+                cls.build_errors[collection] = str(e)
+                logger.error(f"Error building indexes on {collection}: {str(e)}")
+
+    @classmethod
+    async def drift_report(cls, db) -> Dict[str, Any]:
+        """Declared indexes that are missing or differ, and undeclared ones, by collection"""
+        collections = {}
+        for collection, indexes in INDEXES.items():
+            drift = await cls._collection_drift(db, collection, indexes)
+            if drift["missing"] or drift["changed"] or drift["unexpected"]:
+                collections[collection] = drift
+
+        return {
+            "in_sync": not collections,
+            "building": cls.build_task is not None and not cls.build_task.done(),
+            "build_errors": cls.build_errors,
+            "collections": collections
+        }
+
+    @staticmethod
+    async def _collection_drift(db, collection: str, indexes: List[IndexModel]) -> Dict[str, Any]:
+        existing = await db[collection].index_information()
+        missing = []
+        changed = {}
+
+        for index in indexes:
+            declared = index.document
+            name = declared["name"]
+            current = existing.get(name)
+            if current is None:
+                missing.append(name)
+                continue
+
+            differences = {}
+            if [tuple(key) for key in current["key"]] != list(declared["key"].items()):
+                differences["key"] = {"declared": list(declared["key"].items()), "actual": current["key"]}
+            for option in COMPARED_OPTIONS:
+                if declared.get(option) != current.get(option):
+                    differences[option] = {"declared": declared.get(option), "actual": current.get(option)}
+            if differences:
+                changed[name] = differences
+
+        declared_names = {index.document["name"] for index in indexes}
+        unexpected = [name for name in existing if name != "_id_" and name not in declared_names]
+
+        return {"missing": missing, "changed": changed, "unexpected": unexpected}
@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING
+
+# Newest first; _id breaks ties between documents created in the same instant.
+# Legacy documents without created_at sort after all others, by _id alone
+SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+def encode_cursor(document: Dict[str, Any]) -> str:
+    """Opaque token pointing just past a document in SORT order"""
+    created_at = document.get("created_at")
+    position = {
+        "t": created_at.isoformat() if isinstance(created_at, datetime) else None,
+        "i": str(document["_id"])
+    }
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], ObjectId]:
+    """
+    Position encoded in a cursor token, with no created_at for a legacy
+    document; raises ValueError if it is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(position["t"]) if position["t"] is not None else None
+        return created_at, ObjectId(position["i"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+def date_range(created_from: Optional[datetime] = None, created_to: Optional[datetime] = None) -> Dict[str, Any]:
+    """created_at filter for [created_from, created_to)"""
+    bounds = {}
+    if created_from:
+        bounds["$gte"] = created_from
+    if created_to:
+        bounds["$lt"] = created_to
+    return {"created_at": bounds} if bounds else {}
+
+async def paginate(
+    collection,
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    One page of a collection, newest first, using keyset pagination on
+    (created_at, _id) so every page costs the same however deep it is
+    Returns {"items": [...], "next_cursor": token or None}
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        if created_at is None:
+            # Already in the undated tail, which is ordered by _id alone
+            after = {"created_at": None, "_id": {"$lt": last_id}}
+        else:
+            # $lt never matches a missing field, so the undated tail is
+            # listed explicitly
+            after = {
+                "$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": last_id}},
+                    {"created_at": None}
+                ]
+            }
+        query = {"$and": [query, after]} if query else after
+
+    # Fetch one extra document to learn whether there is another page
+    documents: List[Dict[str, Any]] = await collection.find(
+        query, projection=projection, sort=SORT, limit=limit + 1
+    ).to_list(length=None)
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1])
+
+    # Convert ObjectId to string
+    for document in documents:
+        document["_id"] = str(document["_id"])
+
+    return {"items": documents, "next_cursor": next_cursor}
@@ -0,0 +1,161 @@
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Deque, Optional
+from pymongo import ReturnDocument
+from app.core.config import settings
+from app.core.database import Database
+from app.core.security import PasswordHasher
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is refused; retry_after is in seconds"""
+    def __init__(self, retry_after: float, detail: str = "Too many requests"):
+        super().__init__(detail)
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.detail = detail
+
+class SlidingWindowLimiter:
+    """
+    In-process sliding-window log: at most `limit` hits per key in any
+    `window_seconds`. Refused hits count too, so a client that keeps
+    hammering stays locked out. Keys are evicted least recently used
+    past max_keys.
+    """
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 100000):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._hits: "OrderedDict[str, Deque[float]]" = OrderedDict()
+
+    async def hit(self, key: str) -> Optional[float]:
+        """Record a hit; returns seconds to wait if the key is over its limit"""
+        if self.limit <= 0:
+            return None
+
+        now = time.monotonic()
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque(maxlen=self.limit)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        self._hits.move_to_end(key)
+
+        # With a full log, the oldest of the last `limit` hits decides
+        retry_after = None
+        if len(hits) == self.limit and hits[0] > now - self.window_seconds:
+            retry_after = hits[0] + self.window_seconds - now
+        hits.append(now)
+        return retry_after
+
+class MongoWindowLimiter:
+    """
+    Sliding-window limiter shared by every worker through Mongo. Counts are
+    kept per fixed window and the previous window is weighted by how much
+    of it still overlaps the sliding window.
+    """
+    COLLECTION = "rate_limits"
+
+    def __init__(self, scope: str, limit: int, window_seconds: float):
+        self.scope = scope
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    async def hit(self, key: str) -> Optional[float]:
+        """Record a hit; returns seconds to wait if the key is over its limit"""
+        if self.limit <= 0:
+            return None
+
+        now = time.time()
+        window = int(now // self.window_seconds)
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        collection = Database.db[MongoWindowLimiter.COLLECTION]
+
+        counter = await collection.find_one_and_update(
+            {"_id": f"{self.scope}:{key}:{window}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {
+                    "expires_at": datetime.utcfromtimestamp((window + 2) * self.window_seconds)
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        previous = await collection.find_one(
+            {"_id": f"{self.scope}:{key}:{window - 1}"},
+            projection={"count": 1}
+        )
+
+        current = counter["count"]
+        previous = previous["count"] if previous else 0
+        if previous * (1 - elapsed) + current <= self.limit:
+            return None
+
+        if current >= self.limit:
+            return (1 - elapsed) * self.window_seconds
+        # Wait until enough of the previous window has slid out
+        return (1 - (self.limit - current) / previous - elapsed) * self.window_seconds
+
+class ConcurrencyLimit:
+    """Non-queuing cap on concurrent work: over the cap, callers are refused at once"""
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+
+    @contextmanager
+    def slot(self, retry_after: float = 1):
+        if self.limit > 0 and self.active >= self.limit:
+            raise RateLimitExceeded(retry_after, "Server busy, try again shortly")
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+class LoginLimiter:
+    """
+    Admission control in front of login: sliding-window limits per account
+    and per client IP, and a cap on password verifications in flight so
+    bursts are refused with 429 rather than queued behind bcrypt
+    """
+    _account = None
+    _ip = None
+    _verifications: Optional[ConcurrencyLimit] = None
+
+    @classmethod
+    def verification_slot(cls):
+        """Context manager held around a password verification"""
+        if cls._verifications is None:
+            # By default allow a few rounds of work per hashing process
+            limit = settings.LOGIN_MAX_CONCURRENT_VERIFICATIONS or 4 * PasswordHasher.worker_count()
+            cls._verifications = ConcurrencyLimit(limit)
+        return cls._verifications.slot()
+
+    @classmethod
+    def _limiters(cls):
+        if cls._account is None:
+            window = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+            if settings.LOGIN_RATE_LIMIT_BACKEND == "mongo":
+                cls._account = MongoWindowLimiter("login_account", settings.LOGIN_RATE_LIMIT_PER_ACCOUNT, window)
+                cls._ip = MongoWindowLimiter("login_ip", settings.LOGIN_RATE_LIMIT_PER_IP, window)
+            else:
+                cls._account = SlidingWindowLimiter(settings.LOGIN_RATE_LIMIT_PER_ACCOUNT, window)
+                cls._ip = SlidingWindowLimiter(settings.LOGIN_RATE_LIMIT_PER_IP, window)
+        return cls._account, cls._ip
+
+    @classmethod
+    async def check(cls, email: str, client_ip: Optional[str] = None):
+        """Count a login attempt; raises RateLimitExceeded if it must be refused"""
+        account_limiter, ip_limiter = cls._limiters()
+
+        if client_ip:
+            retry_after = await ip_limiter.hit(client_ip)
+            if retry_after is not None:
+                raise RateLimitExceeded(retry_after, "Too many login attempts from this address")
+
+        retry_after = await account_limiter.hit(email.lower())
+        if retry_after is not None:
+            raise RateLimitExceeded(retry_after, "Too many login attempts for this account")
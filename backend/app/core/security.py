@@ -1,9 +1,15 @@
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import Database
 from bson import ObjectId
@@ -17,6 +23,70 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """
+    Bounded process pool for bcrypt, which takes hundreds of milliseconds of
+    CPU per call and would otherwise block the event loop. At most
+    `workers` hashes run at once; further requests wait their turn on the
+    semaphore instead of piling up in the executor. Bulk work (user
+    imports) is held to `workers - 1` of them, so a login never queues
+    behind more than one round of bulk hashes.
+    """
+    executor: Optional[ProcessPoolExecutor] = None
+    semaphore: Optional[asyncio.Semaphore] = None
+    bulk_semaphore: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    def worker_count() -> int:
+        # Leave a core for the event loop unless configured otherwise
+        return settings.PASSWORD_HASH_WORKERS or max(1, (os.cpu_count() or 2) - 1)
+
+    @classmethod
+    def open(cls):
+        if cls.executor is not None:
+            return
+
+        workers = cls.worker_count()
+        cls.executor = ProcessPoolExecutor(max_workers=workers)
+        cls.semaphore = asyncio.Semaphore(workers)
+        cls.bulk_semaphore = asyncio.Semaphore(max(1, workers - 1))
+
+    @classmethod
+    def close(cls):
+        if cls.executor is not None:
+            cls.executor.shutdown(wait=True)
+        cls.executor = None
+        cls.semaphore = None
+        cls.bulk_semaphore = None
+
+    @classmethod
+    async def run(cls, func, *args):
+        # Scripts that never ran the startup hook get a pool lazily
+        if cls.executor is None:
+            cls.open()
+
+        async with cls.semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(cls.executor, func, *args)
+
+    @classmethod
+    async def run_bulk(cls, func, *args):
+        """Like run, for work that must leave a worker free for interactive calls"""
+        if cls.executor is None:
+            cls.open()
+
+        async with cls.bulk_semaphore:
+            return await cls.run(func, *args)
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await PasswordHasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password) -> str:
+    return await PasswordHasher.run(get_password_hash, password)
+
+async def get_password_hash_bulk(password) -> str:
+    return await PasswordHasher.run_bulk(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -27,26 +97,94 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
-    credentials_exception = HTTPException(
+# Authenticated users by id, so polling clients do not cost a users read
+# per request; invalidate_user_cache must be called whenever a user changes
+_user_cache = TTLCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
+
+def invalidate_user_cache(user_id: str):
+    _user_cache.delete(str(user_id))
+
+def user_claims(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Access token claims for a user; carries its flags in claims mode"""
+    claims = {"sub": str(user["_id"])}
+    if settings.AUTH_CLAIMS_IN_TOKEN:
+        claims["is_active"] = user.get("is_active", True)
+        claims["is_admin"] = user.get("is_admin", False)
+    return claims
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+# Claims of tokens that already passed verification, expiring at the
+# token's exp. Keys digest the signing key and algorithm along with the
+# token, so rotating either never serves claims verified under the old key
+_token_cache = TTLCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+def _token_cache_key(token: str) -> str:
+    material = f"{settings.ALGORITHM}\0{settings.SECRET_KEY}\0{token}"
+    return hashlib.sha256(material.encode()).hexdigest()
+
+def _decode_token(token: str) -> Dict[str, Any]:
+    cache_key = _token_cache_key(token)
+    payload = _token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
     
-    user = await Database.db["users"].find_one({"_id": ObjectId(user_id)})
+    if "exp" in payload:
+        _token_cache.set(cache_key, payload, ttl_seconds=payload["exp"] - time.time())
+    return payload
+
+async def _load_user(user_id: str) -> Dict[str, Any]:
+    user = _user_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        user = await Database.db["users"].find_one({"_id": ObjectId(user_id)})
+        if user is None:
+            raise _credentials_exception()
+        
+        # Convert ObjectId to string for JSON serialization
+        user["_id"] = str(user["_id"])
+        _user_cache.set(user_id, user)
+    
+    # Callers get their own copy to modify
+    return dict(user)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """
+    The authenticated user. In claims mode, tokens carrying is_active and
+    is_admin are trusted without a lookup and yield only those fields
+    """
+    payload = _decode_token(token)
+    if settings.AUTH_CLAIMS_IN_TOKEN and "is_active" in payload:
+        return {
+            "_id": payload["sub"],
+            "is_active": payload["is_active"],
+            "is_admin": payload.get("is_admin", False)
+        }
     
-    # Convert ObjectId to string for JSON serialization
-    user["_id"] = str(user["_id"])
+    return await _load_user(payload["sub"])
+
+async def get_current_user_profile(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """The authenticated user's full record, for endpoints that return it"""
+    user = await _load_user(_decode_token(token)["sub"])
+    if not user.get("is_active", True):
+        raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
 async def get_current_active_user(current_user: Dict = Depends(get_current_user)) -> Dict[str, Any]:
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class BikeStatus(str, Enum):
+    AVAILABLE = "available"
+    IN_USE = "in_use"
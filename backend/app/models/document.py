@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field
 from enum import Enum
+from app.models.job import JobStatus
 
 class DocumentType(str, Enum):
     DRIVING_LICENSE = "driving_license"
@@ -23,3 +24,12 @@ class DocumentVerifyResponse(BaseModel):
     doc_id: Optional[str] = None
     verification_details: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+
+class VerificationJobResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+    attempts: int = 0
+    result: Optional[DocumentVerifyResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
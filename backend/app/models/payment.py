@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -36,3 +36,16 @@ class Payment(PaymentBase):
     payment_details: Optional[Dict[str, Any]] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PaymentSummary(BaseModel):
+    id: str = Field(..., alias="_id")
+    ride_id: str
+    amount: float
+    payment_method: PaymentMethod
+    status: PaymentStatus
+    payment_time: Optional[datetime] = None
+    created_at: datetime
+
+class PaymentPage(BaseModel):
+    items: List[PaymentSummary]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -32,3 +32,15 @@ class Penalty(PenaltyBase):
     payment_id: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PenaltySummary(BaseModel):
+    id: str = Field(..., alias="_id")
+    ride_id: str
+    penalty_type: PenaltyType
+    amount: float
+    status: PenaltyStatus
+    created_at: datetime
+
+class PenaltyPage(BaseModel):
+    items: List[PenaltySummary]
+    next_cursor: Optional[str] = None
@@ -42,3 +42,17 @@ class Ride(RideBase):
     destination_image_url: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class RideSummary(BaseModel):
+    id: str = Field(..., alias="_id")
+    status: RideStatus
+    bike_id: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    distance_km: Optional[float] = None
+    fare_amount: Optional[float] = None
+    created_at: datetime
+
+class RidePage(BaseModel):
+    items: List[RideSummary]
+    next_cursor: Optional[str] = None
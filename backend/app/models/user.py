@@ -29,6 +29,15 @@ class User(UserBase):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class UserAdminUpdate(BaseModel):
+    full_name: Optional[str] = None
+    phone: Optional[str] = None
+    is_active: Optional[bool] = None
+    is_admin: Optional[bool] = None
+
+class UserImportRow(UserBase):
+    password: str = Field(..., min_length=1)
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str
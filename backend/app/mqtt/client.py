@@ -2,6 +2,7 @@ import paho.mqtt.client as mqtt
 from app.core.config import settings
 import logging
 from typing import Dict, Any, Optional, Callable
+import asyncio
 import json
 
 logger = logging.getLogger(__name__)
@@ -16,6 +17,7 @@ class MQTTClient:
             cls._instance.client = mqtt.Client(callback_api_version=mqtt.CallbackAPIVersion.VERSION1)
             cls._instance.connected = False
             cls._instance.handlers = {}
+            cls._instance.loop = None
         return cls._instance
     
     def connect(self):
@@ -24,6 +26,13 @@ class MQTTClient:
             return
             
         try:
+            # Handlers are coroutines; remember the app's event loop so the
+            # network thread can hand messages over to it
+            try:
+                self.loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.loop = None
+            
             # Set up client
             self.client.on_connect = self._on_connect
             self.client.on_message = self._on_message
@@ -116,7 +125,13 @@ class MQTTClient:
             # Find handler for topic
             for topic_pattern, handler in self.handlers.items():
                 if mqtt.topic_matches_sub(topic_pattern, msg.topic):
-                    handler(msg.topic, payload)
+                    result = handler(msg.topic, payload)
+                    if asyncio.iscoroutine(result):
+                        if self.loop is None:
+                            result.close()
+                            logger.error(f"No event loop to run handler for {msg.topic}")
+                        else:
+                            asyncio.run_coroutine_threadsafe(result, self.loop)
                     break
                     
         except json.JSONDecodeError:
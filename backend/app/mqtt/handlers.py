@@ -1,5 +1,9 @@
 from app.mqtt.client import MQTTClient
 from app.core.database import Database
+from app.services.geofencing_service import GeofencingService
+from app.services.occupancy_service import OccupancyService
+from app.services.ride_trace_service import RideTraceService
+from app.services.zone_event_service import ZoneEventService
 from bson import ObjectId
 import logging
 from datetime import datetime
@@ -34,6 +38,19 @@ async def handle_bike_status(topic: str, payload: dict):
                 upsert=True
             )
             
+            # One zone lookup, through the configured geofence backend, feeds
+            # both the occupancy counters and the enter/exit event stream
+            lng = payload["location"]["longitude"]
+            lat = payload["location"]["latitude"]
+            in_zone, zone = await GeofencingService.is_point_in_any_zone(lat, lng)
+            zone_id = str(zone["_id"]) if in_zone else None
+            
+            await OccupancyService.update_bike_zone(bike_id, zone_id)
+            await ZoneEventService.process_location(bike_id, lng, lat, zone_id, payload.get("timestamp"))
+            
+            # Extend the GPS trace if the bike is on an active ride
+            await RideTraceService.add_point(bike_id, lng, lat, payload.get("timestamp"))
+            
         logger.info(f"Updated status for bike {bike_id}")
             
     except Exception as e:
@@ -1,8 +1,11 @@
 from bson import ObjectId
 from app.core.database import Database
-from app.core.security import get_password_hash, verify_password, create_access_token
-from app.models.user import UserCreate, User, UserLogin
-from datetime import timedelta
+from app.core.rate_limit import LoginLimiter
+from app.core.security import get_password_hash_async, verify_password_async, create_access_token, invalidate_user_cache, user_claims
+from app.models.user import UserCreate, User, UserLogin, UserAdminUpdate
+from app.services.stats_service import StatsService
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta
 from app.core.config import settings
 from typing import Optional, Dict, Any
 
@@ -24,7 +27,7 @@ class AuthService:
             
         user_dict = user_data.dict()
         # Hash the password
-        user_dict["password"] = get_password_hash(user_dict["password"])
+        user_dict["password"] = await get_password_hash_async(user_dict["password"])
         # Remove agreed_to_terms from database storage
         agreed = user_dict.pop("agreed_to_terms")
         
@@ -37,36 +40,62 @@ class AuthService:
         user_dict["is_admin"] = False
         user_dict["created_at"] = user_dict["updated_at"] = user_dict.get("created_at", None) or user_dict.get("updated_at", None) or user_dict.get(datetime.utcnow())
         
-        # Insert into database
+        # Insert into database; the inserted document is the response
         result = await Database.db["users"].insert_one(user_dict)
+        user_dict["_id"] = str(result.inserted_id)
+        await StatsService.users_created()
         
-        # Get the created user
-        created_user = await Database.db["users"].find_one({"_id": result.inserted_id})
-        # Convert ObjectId to string for the response
-        created_user["_id"] = str(created_user["_id"])
-        
-        return created_user
+        return user_dict
     
     @staticmethod
     async def authenticate_user(email: str, password: str) -> Optional[Dict[str, Any]]:
         user = await AuthService.get_user_by_email(email)
         if not user:
             return None
-        if not verify_password(password, user["password"]):
+        # Refuse rather than queue when too many verifications are in flight
+        with LoginLimiter.verification_slot():
+            verified = await verify_password_async(password, user["password"])
+        if not verified:
             return None
         # Convert ObjectId to string
         user["_id"] = str(user["_id"])
         return user
     
     @staticmethod
-    async def login(user_data: UserLogin) -> Optional[Dict[str, Any]]:
+    async def update_user(user_id: str, updates: UserAdminUpdate) -> Optional[Dict[str, Any]]:
+        """Apply an admin edit to a user, e.g. deactivating them"""
+        changes = updates.dict(exclude_unset=True)
+        if not changes:
+            raise ValueError("No changes given")
+        changes["updated_at"] = datetime.utcnow()
+        
+        user = await Database.db["users"].find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$set": changes},
+            projection={"password": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if not user:
+            return None
+        
+        invalidate_user_cache(user_id)
+        user["_id"] = str(user["_id"])
+        return user
+    
+    @staticmethod
+    async def login(user_data: UserLogin, client_ip: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Log a user in
+        Raises RateLimitExceeded when the attempt is refused by admission control
+        """
+        await LoginLimiter.check(user_data.email, client_ip)
         user = await AuthService.authenticate_user(user_data.email, user_data.password)
         if not user:
             return None
             
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user["_id"]}, expires_delta=access_token_expires
+            data=user_claims(user), expires_delta=access_token_expires
         )
         
         return {
@@ -79,7 +108,7 @@ class AuthService:
     async def create_user(user_data: UserCreate):
         user_dict = user_data.dict()
         # Hash the password
-        user_dict["password"] = get_password_hash(user_dict["password"])
+        user_dict["password"] = await get_password_hash_async(user_dict["password"])
         # Remove agreed_to_terms from database storage
         agreed = user_dict.pop("agreed_to_terms")
         
@@ -94,12 +123,9 @@ class AuthService:
         user_dict["created_at"] = datetime.utcnow()
         user_dict["updated_at"] = datetime.utcnow()
         
-        # Insert into database
+        # Insert into database; the inserted document is the response
         result = await Database.db["users"].insert_one(user_dict)
+        user_dict["_id"] = str(result.inserted_id)
+        await StatsService.users_created()
         
-        # Get the created user
-        created_user = await Database.db["users"].find_one({"_id": result.inserted_id})
-        # Convert ObjectId to string for the response
-        created_user["_id"] = str(created_user["_id"])
-        
-        return created_user
\ No newline at end of file
+        return user_dict
\ No newline at end of file
@@ -1,64 +1,213 @@
-import requests
+import asyncio
+import hashlib
+import json
 from typing import Dict, Any, Optional
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import Database
+from app.core.http_client import HTTPClient
+from app.core.security import invalidate_user_cache
+from app.services.job_queue import JobQueue
 from bson import ObjectId
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+class DigiLockerUnavailable(Exception):
+    """DigiLocker could not be reached or failed on its side; worth retrying"""
+
 class DigiLockerService:
     API_BASE_URL = "https://api.digilocker.gov.in/v2"
+    VERIFY_JOB = "digilocker.verify"
+    # Client errors that are a verdict on the document itself. Other 4xx
+    # responses (401, 403, 405, ...) point at our credentials or request
+    # setup, so they are retried rather than recorded against the document
+    REJECTION_STATUSES = {400, 404, 410, 422}
+    
+    # Recent verification results by content key, and verifications in flight
+    # in this process; the jobs collection backs both across workers
+    _results = TTLCache(
+        max_size=settings.DIGILOCKER_CACHE_MAX_SIZE,
+        ttl_seconds=settings.DIGILOCKER_CACHE_TTL_SECONDS
+    )
+    _in_flight: Dict[str, asyncio.Future] = {}
     
     @staticmethod
-    async def verify_document(user_id: str, doc_type: str, doc_data: Dict[str, Any]) -> Dict[str, Any]:
+    def verification_key(doc_type: str, doc_id: str, doc_data: Dict[str, Any]) -> str:
+        """Content key for a submission: doc type, doc id and a hash of the payload"""
+        payload = json.dumps(doc_data, sort_keys=True, separators=(",", ":"), default=str)
+        digest = hashlib.sha256(payload.encode()).hexdigest()
+        # DocumentType members and their plain string values give the same key
+        doc_type = getattr(doc_type, "value", doc_type)
+        return f"{doc_type}:{doc_id}:{digest}"
+    
+    @staticmethod
+    async def enqueue_verification(
+        user_id: str,
+        doc_type: str,
+        doc_id: str,
+        doc_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Queue a document for verification and return the job immediately
+        The result is recorded on the job once a worker has called DigiLocker;
+        resubmitting the same document returns the pending or recent job
+        """
+        key = DigiLockerService.verification_key(doc_type, doc_id, doc_data)
+        return await JobQueue.enqueue(
+            DigiLockerService.VERIFY_JOB,
+            {
+                "user_id": user_id,
+                "doc_type": doc_type,
+                "doc_id": doc_id,
+                "doc_data": doc_data,
+                "verification_key": key
+            },
+            user_id=user_id,
+            dedupe_key=key,
+            dedupe_seconds=settings.DIGILOCKER_CACHE_TTL_SECONDS
+        )
+    
+    @staticmethod
+    async def run_verification_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Job handler: verify a queued document and record the result"""
+        result = await DigiLockerService.verify_cached(
+            payload["doc_type"],
+            payload["doc_id"],
+            payload["doc_data"],
+            payload["verification_key"]
+        )
+        
+        if result["verified"]:
+            await DigiLockerService.record_verification(payload["user_id"], result)
+        
+        return result
+    
+    @staticmethod
+    async def verify_cached(
+        doc_type: str,
+        doc_id: str,
+        doc_data: Dict[str, Any],
+        key: str
+    ) -> Dict[str, Any]:
+        """
+        Verify a document, reusing a recent result for the same content
+        Concurrent verifications of the same content share one API call
+        """
+        result = DigiLockerService._results.get(key)
+        if result is not None:
+            return result
+        
+        if key in DigiLockerService._in_flight:
+            return await asyncio.shield(DigiLockerService._in_flight[key])
+        
+        future = asyncio.get_event_loop().create_future()
+        DigiLockerService._in_flight[key] = future
+        try:
+            result = await JobQueue.find_recent_result(
+                DigiLockerService.VERIFY_JOB,
+                key,
+                settings.DIGILOCKER_CACHE_TTL_SECONDS
+            )
+            if result is None:
+                result = await DigiLockerService.verify_document(doc_type, doc_id, doc_data)
+            result["content_hash"] = key.rsplit(":", 1)[1]
+            DigiLockerService._results.set(key, result)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark it retrieved for the case with none
+            future.exception()
+            raise
+        finally:
+            DigiLockerService._in_flight.pop(key, None)
+    
+    @staticmethod
+    async def verify_document(doc_type: str, doc_id: str, doc_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Verify a document through DigiLocker API
-        Returns verification result
+        Returns verification result; raises DigiLockerUnavailable on
+        transient failures so the job is retried
         """
+        # This is a placeholder for the actual API integration
+        # In a real implementation, you would call DigiLocker API endpoints
+        
+        # Example request to DigiLocker API
+        headers = {
+            "Authorization": f"Bearer {settings.DIGILOCKER_API_KEY}",
+            "Content-Type": "application/json"
+        }
+        
+        # Example request to verify a document
+        # In a real implementation, use the actual API endpoints and data format
         try:
-            # This is a placeholder for the actual API integration
-            # In a real implementation, you would call DigiLocker API endpoints
-            
-            # Example request to DigiLocker API
-            headers = {
-                "Authorization": f"Bearer {settings.DIGILOCKER_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            
-            # Example request to verify a document
-            # In a real implementation, use the actual API endpoints and data format
-            response = requests.post(
+            status_code, response = await HTTPClient.post_json(
                 f"{DigiLockerService.API_BASE_URL}/verify-document",
                 headers=headers,
                 json=doc_data
             )
-            
-            # For demonstration, we'll assume it's successful
-            # In a real implementation, parse the actual API response
-            verification_result = {
-                "verified": True,
+        except Exception as e:
+            raise DigiLockerUnavailable(f"DigiLocker request failed: {str(e)}")
+        
+        if status_code >= 400 and status_code not in DigiLockerService.REJECTION_STATUSES:
+            if 400 <= status_code < 500 and status_code != 429:
+                logger.error(f"DigiLocker refused the request ({status_code}); check DIGILOCKER_API_KEY and the API setup")
+            raise DigiLockerUnavailable(f"DigiLocker returned {status_code}")
+        
+        if status_code >= 400:
+            # The document itself was rejected; retrying will not change that
+            return {
+                "verified": False,
                 "doc_type": doc_type,
-                "doc_id": doc_data.get("doc_id", ""),
-                "verification_date": datetime.utcnow(),
-                "verification_details": {
-                    "status": "VALID",
-                    "verification_time": datetime.utcnow().isoformat()
-                }
+                "doc_id": doc_id,
+                "error": f"DigiLocker rejected the document ({status_code})"
+            }
+        
+        # For demonstration, we'll assume it's successful
+        # In a real implementation, parse the actual API response
+        return {
+            "verified": True,
+            "doc_type": doc_type,
+            "doc_id": doc_id,
+            "verification_date": datetime.utcnow(),
+            "verification_details": {
+                "status": "VALID",
+                "verification_time": datetime.utcnow().isoformat()
             }
-            
-            # Update user's documents in the database
+        }
+    
+    @staticmethod
+    async def record_verification(user_id: str, verification_result: Dict[str, Any]):
+        """
+        Add a verified document to the user's documents
+        Replaces the entry for the same doc type and id, so repeats never
+        add a duplicate
+        """
+        match = {"doc_type": verification_result["doc_type"], "doc_id": verification_result["doc_id"]}
+        
+        result = await Database.db["users"].update_one(
+            {"_id": ObjectId(user_id), "documents": {"$elemMatch": match}},
+            {"$set": {"documents.$": verification_result}}
+        )
+        if not result.matched_count:
+            # Guarded push: a concurrent recorder that got here first wins
             await Database.db["users"].update_one(
-                {"_id": ObjectId(user_id)},
+                {"_id": ObjectId(user_id), "documents": {"$not": {"$elemMatch": match}}},
                 {"$push": {"documents": verification_result}}
             )
-            
-            return verification_result
-            
-        except Exception as e:
-            logger.error(f"Error verifying document: {str(e)}")
-            return {
-                "verified": False,
-                "error": str(e)
-            }
+        
+        invalidate_user_cache(user_id)
+    
+    @staticmethod
+    async def get_verification_job(job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a verification job by ID"""
+        if not ObjectId.is_valid(job_id):
+            return None
+        
+        job = await JobQueue.get_job(job_id)
+        if job is None or job["type"] != DigiLockerService.VERIFY_JOB:
+            return None
+        
+        return job
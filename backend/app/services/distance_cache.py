@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DistanceCache:
+    """
+    Two-level cache for Distance Matrix results: an in-process LRU in front
+    of a shared Mongo collection with a TTL index, so every worker benefits
+    from a lookup paid for by any of them. Without a database connection
+    (scripts, benchmarks) only the in-process level is used.
+    """
+    COLLECTION = "distance_cache"
+
+    _memory = TTLCache(
+        max_size=settings.DISTANCE_CACHE_MAX_SIZE,
+        ttl_seconds=settings.DISTANCE_CACHE_TTL_SECONDS
+    )
+    _db_hits = 0
+    _db_misses = 0
+
+    @staticmethod
+    def make_key(source_coords: List[float], dest_coords: List[float], mode: str) -> str:
+        """Key on coordinates rounded to DISTANCE_CACHE_PRECISION decimal places"""
+        precision = settings.DISTANCE_CACHE_PRECISION
+        points = ":".join(
+            f"{round(coords[0], precision)},{round(coords[1], precision)}"
+            for coords in (source_coords, dest_coords)
+        )
+        return f"{mode}:{points}"
+
+    @staticmethod
+    async def get(key: str) -> Optional[float]:
+        """Return the cached distance in kilometers, or None on a miss"""
+        distance_km = DistanceCache._memory.get(key)
+        if distance_km is not None:
+            return distance_km
+
+        if Database.db is None:
+            return None
+
+        # TTL monitor runs about once a minute, so filter on age as well
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.DISTANCE_CACHE_TTL_SECONDS)
+        entry = await Database.db[DistanceCache.COLLECTION].find_one(
+            {"_id": key, "created_at": {"$gte": cutoff}},
+            projection={"distance_km": 1}
+        )
+
+        if entry is None:
+            DistanceCache._db_misses += 1
+            return None
+
+        DistanceCache._db_hits += 1
+        DistanceCache._memory.set(key, entry["distance_km"])
+        return entry["distance_km"]
+
+    @staticmethod
+    async def set(key: str, distance_km: float):
+        DistanceCache._memory.set(key, distance_km)
+        if Database.db is None:
+            return
+
+        await Database.db[DistanceCache.COLLECTION].update_one(
+            {"_id": key},
+            {"$set": {"distance_km": distance_km, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """Hit and miss counters for both cache levels in this process"""
+        memory = DistanceCache._memory.stats()
+        hits = memory["hits"] + DistanceCache._db_hits
+        lookups = memory["hits"] + memory["misses"]
+
+        return {
+            "memory": memory,
+            "shared": {
+                "hits": DistanceCache._db_hits,
+                "misses": DistanceCache._db_misses
+            },
+            "hits": hits,
+            "misses": DistanceCache._db_misses,
+            "hit_rate": hits / lookups if lookups else None
+        }
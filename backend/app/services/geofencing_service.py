@@ -1,11 +1,19 @@
-from typing import Dict, List, Tuple, Any
-from shapely.geometry import Point, Polygon
+from typing import Dict, List, Optional, Tuple, Any
+import numpy as np
+import shapely
+from shapely.geometry import shape
+from app.core.config import settings
 from app.core.database import Database
+from app.services.occupancy_service import OccupancyService
+from app.services.zone_index import ZoneIndex
 import logging
 
 logger = logging.getLogger(__name__)
 
 class GeofencingService:
+    # Fields needed to answer a parking check; skips shipping the polygon back
+    ZONE_PROJECTION = {"name": 1, "properties": 1}
+    
     @staticmethod
     async def get_all_parking_zones():
         """Retrieve all parking zones from the database"""
@@ -17,18 +25,38 @@ class GeofencingService:
         Check if a point is within any parking zone
         Returns a tuple: (is_in_zone, zone_info)
         """
-        point = Point(lng, lat)  # GeoJSON uses (lng, lat) order
+        if settings.GEOFENCE_BACKEND == "mongo":
+            return await GeofencingService._find_zone_in_db(lat, lng)
         
-        # Get all parking zones
-        zones = await GeofencingService.get_all_parking_zones()
+        # The index is normally warmed at startup; load it lazily otherwise
+        if not ZoneIndex.is_loaded():
+            await ZoneIndex.warm()
         
-        for zone in zones:
-            # Extract coordinates from GeoJSON polygon
-            polygon_coords = zone["geometry"]["coordinates"][0]
-            polygon = Polygon(polygon_coords)
-            
-            if polygon.contains(point):
-                return True, zone
+        zone = ZoneIndex.lookup(lng, lat)  # GeoJSON uses (lng, lat) order
+        if zone is not None:
+            return True, zone
+        
+        return False, {}
+    
+    @staticmethod
+    async def _find_zone_in_db(lat: float, lng: float) -> Tuple[bool, Dict]:
+        """
+        Let MongoDB answer the point-in-zone query through the 2dsphere index
+        on parking_zones.geometry, returning only the matching zone
+        """
+        zone = await Database.db["parking_zones"].find_one(
+            {
+                "geometry": {
+                    "$geoIntersects": {
+                        "$geometry": {"type": "Point", "coordinates": [lng, lat]}
+                    }
+                }
+            },
+            projection=GeofencingService.ZONE_PROJECTION
+        )
+        
+        if zone:
+            return True, zone
         
         return False, {}
     
@@ -51,16 +79,79 @@ class GeofencingService:
         if is_valid:
             result["zone_name"] = zone.get("properties", {}).get("name", "Unknown Zone")
             result["zone_id"] = str(zone.get("_id", ""))
+            
+            # Zones without a capacity never fill up, so skip the counter read
+            if zone.get("properties", {}).get("capacity") is not None:
+                occupancy = await OccupancyService.get_zone_occupancy(result["zone_id"])
+                if occupancy:
+                    result["zone_occupancy"] = occupancy["occupancy"]
+                    result["zone_capacity"] = occupancy["capacity"]
+                    result["zone_full"] = occupancy["is_full"]
+                    
+                    if occupancy["is_full"] and settings.GEOFENCE_REJECT_FULL_ZONES:
+                        result["is_valid_parking"] = False
+                        result["reason"] = "Parking zone is full"
         
         return result
     
+    @staticmethod
+    async def classify_points(points: List[List[float]]) -> List[Optional[str]]:
+        """
+        Classify many [lng, lat] points against the parking zones in one pass
+        Returns the zone id for each point, or None if it is outside every zone
+        """
+        if settings.GEOFENCE_BACKEND == "mongo":
+            return await GeofencingService._classify_in_db(points)
+        
+        if not ZoneIndex.is_loaded():
+            await ZoneIndex.warm()
+        
+        zones = ZoneIndex.lookup_many(points)
+        return [str(zone["_id"]) if zone is not None else None for zone in zones]
+    
+    @staticmethod
+    async def _classify_in_db(points: List[List[float]]) -> List[Optional[str]]:
+        """
+        Batch version of _find_zone_in_db: one $geoIntersects query fetches
+        the zones touching any of the points, and each point then takes the
+        first of those zones it falls in
+        """
+        zone_ids: List[Optional[str]] = [None] * len(points)
+        if not points:
+            return zone_ids
+        
+        zones = await Database.db["parking_zones"].find(
+            {
+                "geometry": {
+                    "$geoIntersects": {
+                        "$geometry": {"type": "MultiPoint", "coordinates": points}
+                    }
+                }
+            },
+            projection={"geometry": 1}
+        ).to_list(length=None)
+        
+        coords = np.asarray(points, dtype=float).reshape(-1, 2)
+        unmatched = np.ones(len(coords), dtype=bool)
+        for zone in zones:
+            # Boundary points count as inside, as they do for $geoIntersects
+            hits = unmatched & shapely.intersects_xy(shape(zone["geometry"]), coords[:, 0], coords[:, 1])
+            for idx in np.flatnonzero(hits):
+                zone_ids[idx] = str(zone["_id"])
+            unmatched &= ~hits
+        
+        return zone_ids
+    
     @staticmethod
     async def create_zone(zone_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new parking zone"""
-        result = await Database.db["parking_zones"].insert_one(zone_data)
+        created_zone = dict(zone_data)
+        result = await Database.db["parking_zones"].insert_one(created_zone)
+        created_zone["_id"] = result.inserted_id
+        
+        # Keep the in-memory zone index in sync without reloading every zone
+        ZoneIndex.add_zone(dict(created_zone))
         
-        # Get the created zone
-        created_zone = await Database.db["parking_zones"].find_one({"_id": result.inserted_id})
         # Convert ObjectId to string
         created_zone["_id"] = str(created_zone["_id"])
         
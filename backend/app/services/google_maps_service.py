@@ -1,6 +1,10 @@
-import requests
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Optional, Set, Tuple, Any
 from app.core.config import settings
+from app.core.geodesy import distance_m
+from app.core.http_client import HTTPClient
+from app.services.distance_cache import DistanceCache
+from app.services.road_graph import RoadGraph
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,42 +12,56 @@ logger = logging.getLogger(__name__)
 class GoogleMapsService:
     API_BASE_URL = "https://maps.googleapis.com/maps/api"
     
+    # Distance Matrix request limits
+    MAX_ORIGINS = 25
+    MAX_DESTINATIONS = 25
+    MAX_ELEMENTS = 100
+    
+    # Lookups waiting for the current batching window, per travel mode
+    _pending: Dict[str, Dict[Tuple[str, str], asyncio.Future]] = {}
+    _flush_tasks: Set[asyncio.Task] = set()
+    
     @staticmethod
-    async def calculate_distance(source_coords: List[float], dest_coords: List[float]) -> float:
+    async def calculate_distance(
+        source_coords: List[float],
+        dest_coords: List[float],
+        mode: str = "driving"
+    ) -> float:
         """
         Calculate distance between two points using Google Maps Distance Matrix API
         Returns distance in kilometers
         """
-        try:
-            # Format coordinates for API request (lat,lng format)
-            origin = f"{source_coords[1]},{source_coords[0]}"  # lat,lng
-            destination = f"{dest_coords[1]},{dest_coords[0]}"  # lat,lng
-            
-            # Make API request
-            response = requests.get(
-                f"{GoogleMapsService.API_BASE_URL}/distancematrix/json",
-                params={
-                    "origins": origin,
-                    "destinations": destination,
-                    "mode": "driving",
-                    "key": settings.GOOGLE_MAPS_API_KEY
-                }
-            )
-            
-            data = response.json()
-            
-            # Extract distance value
-            if data["status"] == "OK":
-                distance_meters = data["rows"][0]["elements"][0]["distance"]["value"]
-                return distance_meters / 1000  # Convert to kilometers
-            else:
-                logger.error(f"Distance Matrix API error: {data.get('status', 'Unknown error')}")
-                # Return an approximate distance as fallback (could use haversine formula)
-                return 3.0  # Default placeholder distance
-                
-        except Exception as e:
-            logger.error(f"Error calculating distance: {str(e)}")
-            return 3.0  # Default placeholder distance
+        if settings.DISTANCE_BACKEND == "graph":
+            distance_meters = await GoogleMapsService._graph_distance(source_coords, dest_coords, mode)
+            if distance_meters is None:
+                return GoogleMapsService.estimate_distance(source_coords, dest_coords)
+            return distance_meters / 1000  # Convert to kilometers
+        
+        # Without an API key there is nothing to call; stay usable offline
+        if not settings.GOOGLE_MAPS_API_KEY:
+            return GoogleMapsService.estimate_distance(source_coords, dest_coords)
+        
+        # Riders mostly travel between the same zones, so most queries repeat
+        cache_key = DistanceCache.make_key(source_coords, dest_coords, mode)
+        cached_distance = await DistanceCache.get(cache_key)
+        if cached_distance is not None:
+            return cached_distance
+        
+        # Concurrent lookups are coalesced into multi-origin/destination calls
+        distance_km = await GoogleMapsService._request_distance(source_coords, dest_coords, mode)
+        if distance_km is None:
+            return GoogleMapsService.estimate_distance(source_coords, dest_coords)
+        
+        await DistanceCache.set(cache_key, distance_km)
+        return distance_km
+    
+    @staticmethod
+    def estimate_distance(source_coords: List[float], dest_coords: List[float]) -> float:
+        """
+        Estimate road distance in kilometers without calling the API
+        Straight-line distance scaled by a typical road detour factor
+        """
+        return distance_m(source_coords, dest_coords) * settings.ROAD_DISTANCE_FACTOR / 1000
     
     @staticmethod
     async def verify_destination_reached(current_coords: List[float], dest_coords: List[float], threshold_meters: int = 100) -> bool:
@@ -51,32 +69,190 @@ class GoogleMapsService:
         Verify if the current location is close enough to the destination
         Returns True if within threshold, False otherwise
         """
+        # A 100 m proximity check does not need a routed distance; the
+        # great-circle distance is computed locally without a network call
+        if distance_m(current_coords, dest_coords) > threshold_meters:
+            return False
+        
+        # A road distance is never shorter than the straight line, so only
+        # points already within the threshold need routing
+        if settings.DISTANCE_BACKEND == "graph":
+            walking_meters = await GoogleMapsService._graph_distance(current_coords, dest_coords, "walking")
+            if walking_meters is not None:
+                return walking_meters <= threshold_meters
+        
+        return True
+    
+    @staticmethod
+    async def _graph_distance(
+        source_coords: List[float],
+        dest_coords: List[float],
+        mode: str
+    ) -> Optional[float]:
+        """Road distance in meters from the local road graph, None if unavailable"""
+        # Graph loading and A* are CPU-bound; keep them off the event loop
+        loop = asyncio.get_running_loop()
+        graph = await loop.run_in_executor(None, RoadGraph.for_mode, mode)
+        if graph is None:
+            return None
+        
+        return await loop.run_in_executor(None, graph.distance_m, source_coords, dest_coords)
+    
+    @staticmethod
+    async def _request_distance(
+        source_coords: List[float],
+        dest_coords: List[float],
+        mode: str
+    ) -> Optional[float]:
+        """
+        Queue a distance lookup for the current batching window
+        Identical pending lookups share one result; returns None on failure
+        """
+        # Format coordinates for API request (lat,lng format)
+        pair = (
+            f"{source_coords[1]},{source_coords[0]}",
+            f"{dest_coords[1]},{dest_coords[0]}"
+        )
+        
+        window = settings.DISTANCE_BATCH_WINDOW_MS / 1000
+        if window <= 0:
+            return (await GoogleMapsService._fetch_distance_matrix([pair], mode))[0]
+        
+        loop = asyncio.get_running_loop()
+        pending = GoogleMapsService._pending.setdefault(mode, {})
+        future = pending.get(pair)
+        if future is None:
+            future = loop.create_future()
+            pending[pair] = future
+            # The first lookup of a window schedules the flush for everyone
+            if len(pending) == 1:
+                loop.call_later(window, GoogleMapsService._schedule_flush, mode)
+        
+        # Shield so one cancelled caller does not cancel a shared lookup
+        return await asyncio.shield(future)
+    
+    @staticmethod
+    def _schedule_flush(mode: str):
+        task = asyncio.ensure_future(GoogleMapsService._flush(mode))
+        GoogleMapsService._flush_tasks.add(task)
+        task.add_done_callback(GoogleMapsService._flush_tasks.discard)
+    
+    @staticmethod
+    async def _flush(mode: str):
+        pending = GoogleMapsService._pending.pop(mode, {})
+        if not pending:
+            return
+        
         try:
-            # Format coordinates (lat,lng format)
-            current = f"{current_coords[1]},{current_coords[0]}"  # lat,lng
-            destination = f"{dest_coords[1]},{dest_coords[0]}"  # lat,lng
+            pairs = list(pending.keys())
+            chunks = GoogleMapsService._chunk_pairs(pairs)
+            results = await asyncio.gather(
+                *[GoogleMapsService._fetch_distance_matrix(chunk, mode) for chunk in chunks]
+            )
             
-            # Make API request to get distance between points
-            response = requests.get(
+            for chunk, distances in zip(chunks, results):
+                for pair, distance_km in zip(chunk, distances):
+                    future = pending[pair]
+                    if not future.done():
+                        future.set_result(distance_km)
+        finally:
+            # Cancelled (e.g. at shutdown) or failed part way: settle the rest
+            # as unavailable so waiting callers fall back to the estimate
+            for future in pending.values():
+                if not future.done():
+                    future.set_result(None)
+    
+    @staticmethod
+    def _chunk_pairs(pairs: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """
+        Split origin/destination pairs into requests within the API limits
+        Every origin x destination element of a request is billed, so pairs
+        are first grouped by a shared origin (or destination), which costs
+        nothing extra. Groups are then packed together while the billed
+        elements stay within DISTANCE_BATCH_MAX_ELEMENT_RATIO times the
+        pairs they answer, trading some unrequested elements for fewer calls
+        """
+        by_origin: Dict[str, List[Tuple[str, str]]] = {}
+        by_destination: Dict[str, List[Tuple[str, str]]] = {}
+        for origin, destination in pairs:
+            by_origin.setdefault(origin, []).append((origin, destination))
+            by_destination.setdefault(destination, []).append((origin, destination))
+        
+        if len(by_destination) < len(by_origin):
+            groups, limit = by_destination.values(), GoogleMapsService.MAX_ORIGINS
+        else:
+            groups, limit = by_origin.values(), GoogleMapsService.MAX_DESTINATIONS
+        limit = min(limit, GoogleMapsService.MAX_ELEMENTS)
+        
+        chunks = []
+        for group in groups:
+            for i in range(0, len(group), limit):
+                chunks.append(group[i:i + limit])
+        
+        return GoogleMapsService._pack_chunks(chunks)
+    
+    @staticmethod
+    def _pack_chunks(chunks: List[List[Tuple[str, str]]]) -> List[List[Tuple[str, str]]]:
+        """Greedily merge chunks into shared requests, largest first"""
+        ratio = settings.DISTANCE_BATCH_MAX_ELEMENT_RATIO
+        requests: List[Tuple[Set[str], Set[str], List[Tuple[str, str]]]] = []
+        for chunk in sorted(chunks, key=len, reverse=True):
+            origins = {origin for origin, _ in chunk}
+            destinations = {destination for _, destination in chunk}
+            for request_origins, request_destinations, request_pairs in requests:
+                merged_origins = len(request_origins | origins)
+                merged_destinations = len(request_destinations | destinations)
+                elements = merged_origins * merged_destinations
+                if (
+                    merged_origins <= GoogleMapsService.MAX_ORIGINS
+                    and merged_destinations <= GoogleMapsService.MAX_DESTINATIONS
+                    and elements <= GoogleMapsService.MAX_ELEMENTS
+                    and elements <= ratio * (len(request_pairs) + len(chunk))
+                ):
+                    request_origins.update(origins)
+                    request_destinations.update(destinations)
+                    request_pairs.extend(chunk)
+                    break
+            else:
+                requests.append((origins, destinations, list(chunk)))
+        
+        return [request_pairs for _, _, request_pairs in requests]
+    
+    @staticmethod
+    async def _fetch_distance_matrix(pairs: List[Tuple[str, str]], mode: str) -> List[Optional[float]]:
+        """
+        One Distance Matrix request covering all pairs
+        Returns the distance in kilometers for each pair, None where unavailable
+        """
+        origins = list(dict.fromkeys(origin for origin, _ in pairs))
+        destinations = list(dict.fromkeys(destination for _, destination in pairs))
+        
+        try:
+            # Make API request
+            _, data = await HTTPClient.get_json(
                 f"{GoogleMapsService.API_BASE_URL}/distancematrix/json",
                 params={
-                    "origins": current,
-                    "destinations": destination,
-                    "mode": "walking",  # Walking mode for more precise local distance
+                    "origins": "|".join(origins),
+                    "destinations": "|".join(destinations),
+                    "mode": mode,
                     "key": settings.GOOGLE_MAPS_API_KEY
                 }
             )
             
-            data = response.json()
-            
-            # Check if user has reached destination
-            if data["status"] == "OK":
-                distance_meters = data["rows"][0]["elements"][0]["distance"]["value"]
-                return distance_meters <= threshold_meters
-            else:
+            if data["status"] != "OK":
                 logger.error(f"Distance Matrix API error: {data.get('status', 'Unknown error')}")
-                return False
-                
+                return [None] * len(pairs)
+            
+            distances = []
+            for origin, destination in pairs:
+                element = data["rows"][origins.index(origin)]["elements"][destinations.index(destination)]
+                if element.get("status", "OK") == "OK":
+                    distances.append(element["distance"]["value"] / 1000)  # Convert to kilometers
+                else:
+                    distances.append(None)
+            
+            return distances
+            
         except Exception as e:
-            logger.error(f"Error verifying destination: {str(e)}")
-            return False
+            logger.error(f"Error calculating distance: {str(e)}")
+            return [None] * len(pairs)
@@ -0,0 +1,252 @@
+import asyncio
+from bson import ObjectId
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.core.database import Database
+from app.models.job import JobStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+class JobQueue:
+    """
+    Mongo-backed background job queue. Jobs are claimed atomically with
+    find_one_and_update, so any number of workers across processes can
+    share the collection. A job whose handler raises is retried with
+    exponential backoff until it runs out of attempts; a running job whose
+    lease expires (e.g. the worker died) is picked up again. Jobs queued
+    with a dedupe_key carry it as pending_key until they finish, and a
+    partial unique index on it allows one pending job per key.
+    """
+    COLLECTION = "jobs"
+
+    _handlers: Dict[str, JobHandler] = {}
+    _workers: List[asyncio.Task] = []
+    _wakeup: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def register(job_type: str, handler: JobHandler):
+        """Register the coroutine that processes jobs of a type"""
+        JobQueue._handlers[job_type] = handler
+
+    @staticmethod
+    async def enqueue(
+        job_type: str,
+        payload: Dict[str, Any],
+        user_id: Optional[str] = None,
+        dedupe_key: Optional[str] = None,
+        dedupe_seconds: float = 0
+    ) -> Dict[str, Any]:
+        """
+        Queue a job and return it immediately
+        With a dedupe_key, a matching job that is still pending or completed
+        within dedupe_seconds is returned instead of queueing another one
+        """
+        now = datetime.utcnow()
+        job = {
+            "type": job_type,
+            "payload": payload,
+            "user_id": user_id,
+            "dedupe_key": dedupe_key,
+            "status": JobStatus.QUEUED,
+            "attempts": 0,
+            "run_at": now,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        if dedupe_key is None:
+            result = await Database.db[JobQueue.COLLECTION].insert_one(job)
+            job["_id"] = result.inserted_id
+        else:
+            job["pending_key"] = dedupe_key
+            job = await JobQueue._find_or_insert(job, now - timedelta(seconds=dedupe_seconds))
+
+        job["_id"] = str(job["_id"])
+        if job["status"] == JobStatus.QUEUED and JobQueue._wakeup is not None:
+            JobQueue._wakeup.set()
+
+        return job
+
+    @staticmethod
+    async def _find_or_insert(job: Dict[str, Any], completed_since: datetime) -> Dict[str, Any]:
+        query = {
+            "type": job["type"],
+            "user_id": job["user_id"],
+            "dedupe_key": job["dedupe_key"],
+            "$or": [
+                {"status": {"$in": [JobStatus.QUEUED, JobStatus.RUNNING]}},
+                {"status": JobStatus.COMPLETED, "completed_at": {"$gte": completed_since}}
+            ]
+        }
+        attempts = 3
+        for attempt in range(attempts):
+            try:
+                return await Database.db[JobQueue.COLLECTION].find_one_and_update(
+                    query,
+                    {"$setOnInsert": job},
+                    sort=[("created_at", -1)],
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # A concurrent enqueue inserted the same pending job first and
+                # the pending_key index turned ours away; the next attempt
+                # finds that job, or inserts if it has already finished
+                if attempt == attempts - 1:
+                    raise
+
+    @staticmethod
+    async def find_recent_result(job_type: str, dedupe_key: str, max_age_seconds: float) -> Optional[Dict[str, Any]]:
+        """Result of the latest job with this dedupe_key completed within max_age_seconds, for any user"""
+        job = await Database.db[JobQueue.COLLECTION].find_one(
+            {
+                "dedupe_key": dedupe_key,
+                "status": JobStatus.COMPLETED,
+                "type": job_type,
+                "completed_at": {"$gte": datetime.utcnow() - timedelta(seconds=max_age_seconds)}
+            },
+            projection={"result": 1},
+            sort=[("completed_at", -1)]
+        )
+        return job["result"] if job else None
+
+    @staticmethod
+    async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by ID"""
+        job = await Database.db[JobQueue.COLLECTION].find_one({"_id": ObjectId(job_id)})
+        if job:
+            job["_id"] = str(job["_id"])
+        return job
+
+    @staticmethod
+    async def start(concurrency: Optional[int] = None):
+        """Start the worker tasks; concurrency bounds how many jobs run at once"""
+        if JobQueue._workers:
+            return
+
+        concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        JobQueue._wakeup = asyncio.Event()
+        JobQueue._workers = [
+            asyncio.ensure_future(JobQueue._worker(n)) for n in range(concurrency)
+        ]
+        logger.info(f"Started {concurrency} job workers")
+
+    @staticmethod
+    async def stop():
+        """Stop the workers; jobs in flight are retried once their lease expires"""
+        for worker in JobQueue._workers:
+            worker.cancel()
+        await asyncio.gather(*JobQueue._workers, return_exceptions=True)
+        JobQueue._workers = []
+        JobQueue._wakeup = None
+
+    @staticmethod
+    async def _worker(worker_number: int):
+        while True:
+            try:
+                job = await JobQueue._claim()
+                if job is None:
+                    await JobQueue._wait_for_work()
+                    continue
+                await JobQueue._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {worker_number} error: {str(e)}")
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+    @staticmethod
+    async def _wait_for_work():
+        # Woken early by local enqueues; polls for jobs queued by other workers
+        wakeup = JobQueue._wakeup
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+
+    @staticmethod
+    async def _claim() -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await Database.db[JobQueue.COLLECTION].find_one_and_update(
+            {
+                "$or": [
+                    {"status": JobStatus.QUEUED, "run_at": {"$lte": now}},
+                    {"status": JobStatus.RUNNING, "lease_expires_at": {"$lte": now}}
+                ],
+                "type": {"$in": list(JobQueue._handlers)}
+            },
+            {
+                "$set": {
+                    "status": JobStatus.RUNNING,
+                    "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    async def _run(job: Dict[str, Any]):
+        handler = JobQueue._handlers[job["type"]]
+        try:
+            result = await handler(job["payload"])
+        except Exception as e:
+            await JobQueue._retry_or_fail(job, str(e))
+            return
+
+        now = datetime.utcnow()
+        await Database.db[JobQueue.COLLECTION].update_one(
+            {"_id": job["_id"]},
+            {
+                "$set": {
+                    "status": JobStatus.COMPLETED,
+                    "result": result,
+                    "error": None,
+                    "completed_at": now,
+                    "updated_at": now
+                },
+                "$unset": {"lease_expires_at": "", "pending_key": ""}
+            }
+        )
+
+    @staticmethod
+    async def _retry_or_fail(job: Dict[str, Any], error: str):
+        now = datetime.utcnow()
+        attempts = job["attempts"]
+
+        if attempts >= settings.JOB_MAX_ATTEMPTS:
+            logger.error(f"Job {job['_id']} ({job['type']}) failed after {attempts} attempts: {error}")
+            update = {"status": JobStatus.FAILED, "error": error, "updated_at": now}
+        else:
+            delay = min(
+                settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+                settings.JOB_RETRY_MAX_SECONDS
+            )
+            logger.warning(f"Job {job['_id']} ({job['type']}) attempt {attempts} failed, retrying in {delay}s: {error}")
+            update = {
+                "status": JobStatus.QUEUED,
+                "error": error,
+                "run_at": now + timedelta(seconds=delay),
+                "updated_at": now
+            }
+
+        unset = {"lease_expires_at": ""}
+        if update["status"] == JobStatus.FAILED:
+            # A failed job no longer blocks a new one for the same key
+            unset["pending_key"] = ""
+
+        await Database.db[JobQueue.COLLECTION].update_one(
+            {"_id": job["_id"]},
+            {"$set": update, "$unset": unset}
+        )
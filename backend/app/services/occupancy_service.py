@@ -0,0 +1,206 @@
+import asyncio
+from bson import ObjectId
+from typing import Dict, List, Optional, Any
+from pymongo import ReturnDocument
+from app.core.config import settings
+from app.core.database import Database
+from app.models.bike import BikeStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+class OccupancyService:
+    """
+    Per-zone parked bike counters. Each bike remembers the zone it is parked
+    in (bikes.parked_zone_id) and parking_zones.occupancy is adjusted with
+    $inc only when that zone changes, so reads never need an aggregation.
+
+    The bike update and the counter $inc are separate writes, so the
+    counters are recounted from the bikes every
+    OCCUPANCY_RECONCILE_INTERVAL_SECONDS. Each $inc also bumps the zone's
+    occupancy_version, and a correction only applies if the version is
+    unchanged since the recount started, so concurrent moves are never lost.
+    """
+    OCCUPANCY_PROJECTION = {"name": 1, "occupancy": 1, "properties.capacity": 1}
+    
+    _reconciler: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    async def update_bike_zone(bike_id: str, zone_id: Optional[str]) -> bool:
+        """
+        Record the zone a parked bike is currently in, e.g. from telemetry
+        Returns True if the bike changed zone
+        """
+        # Bikes on a ride are not parked anywhere, and the $ne filter makes
+        # repeated telemetry for the same zone a no-op
+        previous = await Database.db["bikes"].find_one_and_update(
+            {
+                "_id": ObjectId(bike_id),
+                "status": {"$ne": BikeStatus.IN_USE},
+                "parked_zone_id": {"$ne": zone_id}
+            },
+            {"$set": {"parked_zone_id": zone_id}},
+            projection={"parked_zone_id": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        
+        if previous is None:
+            return False
+        
+        await OccupancyService._move(previous.get("parked_zone_id"), zone_id)
+        return True
+    
+    @staticmethod
+    async def bike_picked_up(bike_id: str):
+        """Mark a bike as in use at ride start, releasing its parking spot"""
+        if not ObjectId.is_valid(bike_id):
+            return
+        
+        previous = await Database.db["bikes"].find_one_and_update(
+            {"_id": ObjectId(bike_id)},
+            {"$set": {"status": BikeStatus.IN_USE, "parked_zone_id": None}},
+            projection={"parked_zone_id": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        
+        if previous:
+            await OccupancyService._move(previous.get("parked_zone_id"), None)
+    
+    @staticmethod
+    async def bike_parked(bike_id: str, zone_id: Optional[str]):
+        """Mark a bike as available at ride completion, parked in zone_id (if any)"""
+        if not ObjectId.is_valid(bike_id):
+            return
+        
+        previous = await Database.db["bikes"].find_one_and_update(
+            {"_id": ObjectId(bike_id)},
+            {"$set": {"status": BikeStatus.AVAILABLE, "parked_zone_id": zone_id}},
+            projection={"parked_zone_id": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        
+        if previous:
+            await OccupancyService._move(previous.get("parked_zone_id"), zone_id)
+    
+    @staticmethod
+    async def get_zone_occupancy(zone_id: str) -> Optional[Dict[str, Any]]:
+        """Get the current occupancy and capacity of a zone"""
+        if not ObjectId.is_valid(zone_id):
+            return None
+        
+        zone = await Database.db["parking_zones"].find_one(
+            {"_id": ObjectId(zone_id)},
+            projection=OccupancyService.OCCUPANCY_PROJECTION
+        )
+        if zone is None:
+            return None
+        
+        return OccupancyService._format(zone)
+    
+    @staticmethod
+    async def get_all_occupancy(full_only: bool = False) -> List[Dict[str, Any]]:
+        """Get occupancy for every zone, optionally only the zones that are full"""
+        zones = await Database.db["parking_zones"].find(
+            {}, projection=OccupancyService.OCCUPANCY_PROJECTION
+        ).to_list(length=None)
+        
+        occupancy = [OccupancyService._format(zone) for zone in zones]
+        if full_only:
+            occupancy = [zone for zone in occupancy if zone["is_full"]]
+        
+        return occupancy
+    
+    @staticmethod
+    async def reconcile() -> Dict[str, int]:
+        """
+        Recount parked bikes per zone and correct drifted counters
+        Returns how many zones were checked, corrected and skipped because
+        bikes moved in or out during the recount
+        """
+        # Versions first: any move after this point changes them
+        zones = await Database.db["parking_zones"].find(
+            {}, projection={"occupancy": 1, "occupancy_version": 1}
+        ).to_list(length=None)
+        parked = await Database.db["bikes"].aggregate([
+            {"$match": {"status": {"$ne": BikeStatus.IN_USE}, "parked_zone_id": {"$ne": None}}},
+            {"$group": {"_id": "$parked_zone_id", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        counts = {group["_id"]: group["count"] for group in parked}
+        
+        corrected = skipped = 0
+        for zone in zones:
+            expected = counts.get(str(zone["_id"]), 0)
+            if zone.get("occupancy", 0) == expected:
+                continue
+            
+            result = await Database.db["parking_zones"].update_one(
+                {"_id": zone["_id"], "occupancy_version": zone.get("occupancy_version")},
+                {"$set": {"occupancy": expected}}
+            )
+            if result.modified_count:
+                corrected += 1
+                logger.warning(
+                    f"Corrected occupancy of zone {zone['_id']} from {zone.get('occupancy', 0)} to {expected}"
+                )
+            else:
+                skipped += 1
+        
+        return {"checked": len(zones), "corrected": corrected, "skipped": skipped}
+    
+    @staticmethod
+    async def start():
+        """Recount periodically; an interval of 0 disables it"""
+        if OccupancyService._reconciler is None and settings.OCCUPANCY_RECONCILE_INTERVAL_SECONDS > 0:
+            OccupancyService._reconciler = asyncio.ensure_future(OccupancyService._reconcile_loop())
+    
+    @staticmethod
+    async def stop():
+        reconciler = OccupancyService._reconciler
+        if reconciler is None:
+            return
+        
+        reconciler.cancel()
+        await asyncio.gather(reconciler, return_exceptions=True)
+        OccupancyService._reconciler = None
+    
+    @staticmethod
+    async def _reconcile_loop():
+        while True:
+            try:
+                await OccupancyService.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reconciling zone occupancy: {str(e)}")
+            
+            await asyncio.sleep(settings.OCCUPANCY_RECONCILE_INTERVAL_SECONDS)
+    
+    @staticmethod
+    async def _move(from_zone_id: Optional[str], to_zone_id: Optional[str]):
+        if from_zone_id == to_zone_id:
+            return
+        
+        if from_zone_id:
+            await Database.db["parking_zones"].update_one(
+                {"_id": ObjectId(from_zone_id)},
+                {"$inc": {"occupancy": -1, "occupancy_version": 1}}
+            )
+        
+        if to_zone_id:
+            await Database.db["parking_zones"].update_one(
+                {"_id": ObjectId(to_zone_id)},
+                {"$inc": {"occupancy": 1, "occupancy_version": 1}}
+            )
+    
+    @staticmethod
+    def _format(zone: Dict[str, Any]) -> Dict[str, Any]:
+        occupancy = max(zone.get("occupancy", 0), 0)
+        capacity = zone.get("properties", {}).get("capacity")
+        
+        return {
+            "zone_id": str(zone["_id"]),
+            "name": zone.get("name"),
+            "occupancy": occupancy,
+            "capacity": capacity,
+            "is_full": capacity is not None and occupancy >= capacity
+        }
@@ -2,13 +2,23 @@ from bson import ObjectId
 from datetime import datetime
 from typing import Dict, Optional, List, Any
 from app.core.database import Database
+from app.core.errors import NotFoundError, PermissionDeniedError
+from app.core.pagination import paginate
+from pymongo import ReturnDocument
 from app.models.payment import PaymentCreate, PaymentStatus, PaymentMethod
+from app.services.stats_service import StatsService
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
 class PaymentService:
+    # Payment history list fields
+    SUMMARY_PROJECTION = {
+        "ride_id": 1, "amount": 1, "payment_method": 1, "status": 1,
+        "payment_time": 1, "created_at": 1
+    }
+    
     @staticmethod
     async def get_payment(payment_id: str) -> Optional[Dict[str, Any]]:
         """Get a payment by ID"""
@@ -18,16 +28,22 @@ class PaymentService:
         return payment
     
     @staticmethod
-    async def get_user_payments(user_id: str) -> List[Dict[str, Any]]:
-        """Get all payments for a user"""
-        cursor = Database.db["payments"].find({"user_id": user_id})
-        payments = await cursor.to_list(length=None)
-        
-        # Convert ObjectId to string
-        for payment in payments:
-            payment["_id"] = str(payment["_id"])
-            
-        return payments
+    async def get_user_payments(
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        A page of a user's payments, newest first, as summaries
+        Returns {"items": [...], "next_cursor": token or None}
+        """
+        return await paginate(
+            Database.db["payments"],
+            {"user_id": user_id},
+            limit,
+            cursor,
+            projection=PaymentService.SUMMARY_PROJECTION
+        )
     
     @staticmethod
     async def create_payment(payment_data: PaymentCreate) -> Dict:
@@ -41,77 +57,77 @@ class PaymentService:
         if payment_dict["payment_method"] == PaymentMethod.ONLINE:
             payment_dict["transaction_id"] = f"TRANS-{uuid.uuid4().hex[:8].upper()}"
         
-        # Insert into database
+        # Insert into database; the inserted document is the response
         result = await Database.db["payments"].insert_one(payment_dict)
+        payment_dict["_id"] = str(result.inserted_id)
         
-        # Get the created payment
-        created_payment = await Database.db["payments"].find_one({"_id": result.inserted_id})
-        # Convert ObjectId to string
-        created_payment["_id"] = str(created_payment["_id"])
-        
-        return created_payment
+        return payment_dict
     
     @staticmethod
-    async def process_online_payment(payment_id: str, payment_details: Dict) -> Dict:
-        """Process an online payment"""
+    async def process_online_payment(
+        payment_id: str,
+        payment_details: Dict,
+        user_id: Optional[str] = None
+    ) -> Dict:
+        """Process an online payment, only if it belongs to user_id when given"""
         # In a real implementation, this would integrate with a payment gateway
         
-        payment = await PaymentService.get_payment(payment_id)
-        
-        if not payment:
-            raise ValueError("Payment not found")
-        
-        if payment["status"] != PaymentStatus.PENDING:
-            raise ValueError("Payment is not in PENDING status")
-        
-        if payment["payment_method"] != PaymentMethod.ONLINE:
-            raise ValueError("Payment method is not ONLINE")
-        
-        # Update payment status
         now = datetime.utcnow()
-        await Database.db["payments"].update_one(
-            {"_id": ObjectId(payment_id)},
+        return await PaymentService._complete_payment(
+            payment_id,
+            PaymentMethod.ONLINE,
             {
-                "$set": {
-                    "status": PaymentStatus.COMPLETED,
-                    "payment_time": now,
-                    "payment_details": payment_details,
-                    "updated_at": now
-                }
-            }
+                "status": PaymentStatus.COMPLETED,
+                "payment_time": now,
+                "payment_details": payment_details,
+                "updated_at": now
+            },
+            user_id
         )
-        
-        # Get the updated payment
-        updated_payment = await PaymentService.get_payment(payment_id)
-        return updated_payment
     
     @staticmethod
     async def complete_cash_payment(payment_id: str) -> Dict:
         """Mark a cash payment as completed"""
-        payment = await PaymentService.get_payment(payment_id)
-        
-        if not payment:
-            raise ValueError("Payment not found")
-        
-        if payment["status"] != PaymentStatus.PENDING:
-            raise ValueError("Payment is not in PENDING status")
-        
-        if payment["payment_method"] != PaymentMethod.CASH:
-            raise ValueError("Payment method is not CASH")
-        
-        # Update payment status
         now = datetime.utcnow()
-        await Database.db["payments"].update_one(
-            {"_id": ObjectId(payment_id)},
+        return await PaymentService._complete_payment(
+            payment_id,
+            PaymentMethod.CASH,
             {
-                "$set": {
-                    "status": PaymentStatus.COMPLETED,
-                    "payment_time": now,
-                    "updated_at": now
-                }
+                "status": PaymentStatus.COMPLETED,
+                "payment_time": now,
+                "updated_at": now
             }
         )
+    
+    @staticmethod
+    async def _complete_payment(
+        payment_id: str,
+        method: PaymentMethod,
+        changes: Dict[str, Any],
+        user_id: Optional[str] = None
+    ) -> Dict:
+        # The preconditions, ownership included, live in the filter so
+        # checking and updating is one atomic round trip
+        query = {"_id": ObjectId(payment_id), "status": PaymentStatus.PENDING, "payment_method": method}
+        if user_id is not None:
+            query["user_id"] = user_id
+        payment = await Database.db["payments"].find_one_and_update(
+            query,
+            {"$set": changes},
+            return_document=ReturnDocument.AFTER
+        )
         
-        # Get the updated payment
-        updated_payment = await PaymentService.get_payment(payment_id)
-        return updated_payment
+        if payment is None:
+            # Only a failed transition pays for a second read, to say why
+            current = await PaymentService.get_payment(payment_id)
+            if not current:
+                raise NotFoundError("Payment not found")
+            if user_id is not None and current["user_id"] != user_id:
+                raise PermissionDeniedError("Not authorized to process this payment")
+            if current["status"] != PaymentStatus.PENDING:
+                raise ValueError("Payment is not in PENDING status")
+            raise ValueError(f"Payment method is not {method.value.upper()}")
+        
+        payment["_id"] = str(payment["_id"])
+        await StatsService.payment_completed(payment.get("amount", 0))
+        return payment
@@ -2,12 +2,19 @@ from bson import ObjectId
 from datetime import datetime
 from typing import Dict, Optional, List, Any
 from app.core.database import Database
+from app.core.pagination import paginate
+from pymongo import ReturnDocument
 from app.models.penalty import PenaltyCreate, PenaltyStatus, PenaltyType
 import logging
 
 logger = logging.getLogger(__name__)
 
 class PenaltyService:
+    # Penalty history list fields
+    SUMMARY_PROJECTION = {
+        "ride_id": 1, "penalty_type": 1, "amount": 1, "status": 1, "created_at": 1
+    }
+    
     @staticmethod
     async def get_penalty(penalty_id: str) -> Optional[Dict[str, Any]]:
         """Get a penalty by ID"""
@@ -17,16 +24,22 @@ class PenaltyService:
         return penalty
     
     @staticmethod
-    async def get_user_penalties(user_id: str) -> List[Dict[str, Any]]:
-        """Get all penalties for a user"""
-        cursor = Database.db["penalties"].find({"user_id": user_id})
-        penalties = await cursor.to_list(length=None)
-        
-        # Convert ObjectId to string
-        for penalty in penalties:
-            penalty["_id"] = str(penalty["_id"])
-            
-        return penalties
+    async def get_user_penalties(
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        A page of a user's penalties, newest first, as summaries
+        Returns {"items": [...], "next_cursor": token or None}
+        """
+        return await paginate(
+            Database.db["penalties"],
+            {"user_id": user_id},
+            limit,
+            cursor,
+            projection=PenaltyService.SUMMARY_PROJECTION
+        )
     
     @staticmethod
     async def create_penalty(
@@ -48,21 +61,17 @@ class PenaltyService:
             "updated_at": datetime.utcnow()
         }
         
-        # Insert into database
+        # Insert into database; the inserted document is the response
         result = await Database.db["penalties"].insert_one(penalty_data)
+        penalty_data["_id"] = str(result.inserted_id)
         
-        # Get the created penalty
-        created_penalty = await Database.db["penalties"].find_one({"_id": result.inserted_id})
-        # Convert ObjectId to string
-        created_penalty["_id"] = str(created_penalty["_id"])
-        
-        return created_penalty
+        return penalty_data
     
     @staticmethod
     async def pay_penalty(penalty_id: str, payment_id: str) -> Dict[str, Any]:
         """Mark a penalty as paid"""
         now = datetime.utcnow()
-        result = await Database.db["penalties"].update_one(
+        penalty = await Database.db["penalties"].find_one_and_update(
             {"_id": ObjectId(penalty_id), "status": PenaltyStatus.PENDING},
             {
                 "$set": {
@@ -70,21 +79,21 @@ class PenaltyService:
                     "payment_id": payment_id,
                     "updated_at": now
                 }
-            }
+            },
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.modified_count == 0:
+        if penalty is None:
             raise ValueError("Penalty not found or not in PENDING status")
         
-        # Get the updated penalty
-        penalty = await PenaltyService.get_penalty(penalty_id)
+        penalty["_id"] = str(penalty["_id"])
         return penalty
     
     @staticmethod
     async def dispute_penalty(penalty_id: str, dispute_reason: str) -> Dict[str, Any]:
         """Mark a penalty as disputed"""
         now = datetime.utcnow()
-        result = await Database.db["penalties"].update_one(
+        penalty = await Database.db["penalties"].find_one_and_update(
             {"_id": ObjectId(penalty_id), "status": PenaltyStatus.PENDING},
             {
                 "$set": {
@@ -92,12 +101,12 @@ class PenaltyService:
                     "dispute_reason": dispute_reason,
                     "updated_at": now
                 }
-            }
+            },
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.modified_count == 0:
+        if penalty is None:
             raise ValueError("Penalty not found or not in PENDING status")
         
-        # Get the updated penalty
-        penalty = await PenaltyService.get_penalty(penalty_id)
+        penalty["_id"] = str(penalty["_id"])
         return penalty
@@ -2,14 +2,26 @@ from bson import ObjectId
 from datetime import datetime
 from typing import Dict, Optional, List, Any
 from app.core.database import Database
+from app.core.errors import NotFoundError, PermissionDeniedError
+from app.core.pagination import paginate
+from pymongo import ReturnDocument
 from app.models.ride import RideCreate, RideStatus
 from app.services.geofencing_service import GeofencingService
 from app.services.google_maps_service import GoogleMapsService
+from app.services.occupancy_service import OccupancyService
+from app.services.ride_trace_service import RideTraceService
+from app.services.stats_service import StatsService
 import logging
 
 logger = logging.getLogger(__name__)
 
 class RideService:
+    # Fields returned by history lists; detail endpoints return the whole document
+    SUMMARY_PROJECTION = {
+        "status": 1, "bike_id": 1, "start_time": 1, "end_time": 1,
+        "distance_km": 1, "fare_amount": 1, "created_at": 1
+    }
+    
     @staticmethod
     async def get_ride(ride_id: str) -> Optional[Dict[str, Any]]:
         """Get a ride by ID"""
@@ -19,16 +31,22 @@ class RideService:
         return ride
     
     @staticmethod
-    async def get_user_rides(user_id: str) -> List[Dict[str, Any]]:
-        """Get all rides for a user"""
-        cursor = Database.db["rides"].find({"user_id": user_id})
-        rides = await cursor.to_list(length=None)
-        
-        # Convert ObjectId to string
-        for ride in rides:
-            ride["_id"] = str(ride["_id"])
-            
-        return rides
+    async def get_user_rides(
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        A page of a user's rides, newest first, as summaries
+        Returns {"items": [...], "next_cursor": token or None}
+        """
+        return await paginate(
+            Database.db["rides"],
+            {"user_id": user_id},
+            limit,
+            cursor,
+            projection=RideService.SUMMARY_PROJECTION
+        )
     
     @staticmethod
     async def create_ride(ride_data: RideCreate) -> Dict:
@@ -38,23 +56,24 @@ class RideService:
         ride_dict["created_at"] = datetime.utcnow()
         ride_dict["updated_at"] = datetime.utcnow()
         
-        # Insert into database
+        # Insert into database; the inserted document is the response
         result = await Database.db["rides"].insert_one(ride_dict)
+        ride_dict["_id"] = str(result.inserted_id)
         
-        # Get the created ride
-        created_ride = await Database.db["rides"].find_one({"_id": result.inserted_id})
-        # Convert ObjectId to string
-        created_ride["_id"] = str(created_ride["_id"])
-        
-        return created_ride
+        return ride_dict
     
     @staticmethod
-    async def start_ride(ride_id: str, bike_id: str, source_image_url: str) -> Dict:
-        """Start a ride"""
-        # Update ride status to ACTIVE
+    async def start_ride(
+        ride_id: str,
+        bike_id: str,
+        source_image_url: str,
+        user_id: Optional[str] = None
+    ) -> Dict:
+        """Start a ride, only if it belongs to user_id when given"""
+        # Update ride status to ACTIVE and get the updated ride
         now = datetime.utcnow()
-        result = await Database.db["rides"].update_one(
-            {"_id": ObjectId(ride_id), "status": RideStatus.SCHEDULED},
+        ride = await Database.db["rides"].find_one_and_update(
+            RideService._transition_filter(ride_id, user_id, RideStatus.SCHEDULED),
             {
                 "$set": {
                     "status": RideStatus.ACTIVE,
@@ -63,27 +82,42 @@ class RideService:
                     "source_image_url": source_image_url,
                     "updated_at": now
                 }
-            }
+            },
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.modified_count == 0:
-            raise ValueError("Ride not found or not in SCHEDULED status")
+        if ride is None:
+            raise await RideService._transition_error(
+                ride_id, user_id, "start", "Ride is not in SCHEDULED status"
+            )
+        ride["_id"] = str(ride["_id"])
+        await StatsService.ride_started()
+        
+        # The bike leaves its parking zone
+        await OccupancyService.bike_picked_up(bike_id)
+        
+        # Start accumulating the GPS trace from the bike's telemetry
+        await RideTraceService.start_trace(ride_id, bike_id, ride["source"]["coordinates"])
         
-        # Get the updated ride
-        ride = await RideService.get_ride(ride_id)
         return ride
     
     @staticmethod
     async def complete_ride(
         ride_id: str, 
         destination_coords: List[float],  # [lng, lat]
-        destination_image_url: str
+        destination_image_url: str,
+        user_id: Optional[str] = None
     ) -> Dict:
-        """Complete a ride and calculate fare"""
+        """Complete a ride and calculate fare, only if it belongs to user_id when given"""
+        # The fare needs the ride's coordinates and start time, so this read
+        # is also where ownership is checked
         ride = await RideService.get_ride(ride_id)
         
         if not ride:
-            raise ValueError("Ride not found")
+            raise NotFoundError("Ride not found")
+        
+        if user_id is not None and ride["user_id"] != user_id:
+            raise PermissionDeniedError("Not authorized to complete this ride")
         
         if ride["status"] != RideStatus.ACTIVE:
             raise ValueError("Ride is not active")
@@ -103,14 +137,20 @@ class RideService:
         
         # Calculate ride details
         start_time = ride["start_time"]
+        if isinstance(start_time, str):
+            start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00')).replace(tzinfo=None)
         end_time = datetime.utcnow()
-        duration_seconds = (end_time - datetime.fromisoformat(start_time.replace('Z', '+00:00'))).total_seconds()
-        
-        # Calculate distance using Google Maps API
-        source_coords = ride["source"]["coordinates"]
-        distance_km = await GoogleMapsService.calculate_distance(
-            source_coords, destination_coords
-        )
+        duration_seconds = (end_time - start_time).total_seconds()
+        
+        # Use the distance accumulated from the ride's GPS trace; fall back to
+        # the Google Maps API for rides without telemetry
+        trace_distance_km = await RideTraceService.trace_distance(ride_id, destination_coords)
+        distance_km = trace_distance_km
+        if distance_km is None:
+            source_coords = ride["source"]["coordinates"]
+            distance_km = await GoogleMapsService.calculate_distance(
+                source_coords, destination_coords
+            )
         
         # Calculate fare
         base_fare = 20.0  # Base fare in rupees
@@ -119,9 +159,10 @@ class RideService:
         
         fare_amount = base_fare + (duration_seconds / 60 * per_minute_rate) + (distance_km * per_km_rate)
         
-        # Update ride with completion details
-        await Database.db["rides"].update_one(
-            {"_id": ObjectId(ride_id)},
+        # Update ride with completion details; the status filter stops a
+        # concurrent completion from billing the ride twice
+        updated_ride = await Database.db["rides"].find_one_and_update(
+            RideService._transition_filter(ride_id, user_id, RideStatus.ACTIVE),
             {
                 "$set": {
                     "status": RideStatus.COMPLETED,
@@ -132,11 +173,23 @@ class RideService:
                     "fare_amount": fare_amount,
                     "updated_at": end_time
                 }
-            }
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if updated_ride is None:
+            raise ValueError("Ride is not active")
+        updated_ride["_id"] = str(updated_ride["_id"])
+        await StatsService.ride_completed()
+        
+        # Only the completion that won the transition closes the trace
+        await RideTraceService.close_trace(
+            ride_id, ride.get("bike_id"), destination_coords, trace_distance_km
         )
         
-        # Get the updated ride
-        updated_ride = await RideService.get_ride(ride_id)
+        # The bike is parked again, counted against the zone it was left in
+        if ride.get("bike_id"):
+            await OccupancyService.bike_parked(ride["bike_id"], parking_validation.get("zone_id"))
         
         # Check for invalid parking and create penalty if needed
         if not parking_validation["is_valid_parking"]:
@@ -152,22 +205,45 @@ class RideService:
         return updated_ride
     
     @staticmethod
-    async def cancel_ride(ride_id: str) -> Dict:
-        """Cancel a ride"""
+    async def cancel_ride(ride_id: str, user_id: Optional[str] = None) -> Dict:
+        """Cancel a ride, only if it belongs to user_id when given"""
         now = datetime.utcnow()
-        result = await Database.db["rides"].update_one(
-            {"_id": ObjectId(ride_id), "status": RideStatus.SCHEDULED},
+        ride = await Database.db["rides"].find_one_and_update(
+            RideService._transition_filter(ride_id, user_id, RideStatus.SCHEDULED),
             {
                 "$set": {
                     "status": RideStatus.CANCELLED,
                     "updated_at": now
                 }
-            }
+            },
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.modified_count == 0:
-            raise ValueError("Ride not found or cannot be cancelled")
+        if ride is None:
+            raise await RideService._transition_error(
+                ride_id, user_id, "cancel", "Ride cannot be cancelled"
+            )
         
-        # Get the updated ride
-        ride = await RideService.get_ride(ride_id)
+        ride["_id"] = str(ride["_id"])
         return ride
+    
+    @staticmethod
+    def _transition_filter(ride_id: str, user_id: Optional[str], status: RideStatus) -> Dict[str, Any]:
+        # Ownership and state are preconditions of the update itself, so a
+        # transition is a single round trip
+        query = {"_id": ObjectId(ride_id), "status": status}
+        if user_id is not None:
+            query["user_id"] = user_id
+        return query
+    
+    @staticmethod
+    async def _transition_error(ride_id: str, user_id: Optional[str], action: str, message: str) -> ValueError:
+        # Only a failed transition pays for a second read, to say why
+        ride = await Database.db["rides"].find_one(
+            {"_id": ObjectId(ride_id)}, projection={"user_id": 1}
+        )
+        if ride is None:
+            return NotFoundError("Ride not found")
+        if user_id is not None and ride["user_id"] != user_id:
+            return PermissionDeniedError(f"Not authorized to {action} this ride")
+        return ValueError(message)
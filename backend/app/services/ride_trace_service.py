@@ -0,0 +1,265 @@
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Any
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import Database
+from app.core.geodesy import distance_m, douglas_peucker, project_local
+from app.models.ride import RideStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RideTraceService:
+    """
+    Per-ride GPS traces built from bike telemetry. Ride distance is
+    accumulated as each point arrives, so completing a ride only reads a
+    running total; the stored trace is compressed with Douglas-Peucker once
+    the ride is over.
+    """
+    COLLECTION = "ride_traces"
+
+    # bike_id -> active ride_id ("" when the bike is not on a ride); other
+    # workers' ride starts are picked up once the entry expires
+    _ride_by_bike = TTLCache(max_size=100000, ttl_seconds=30)
+    # ride_id -> last accepted [lng, lat, ts]; entries for rides that are
+    # never completed age out and are reloaded from the trace if needed
+    _last_points = TTLCache(max_size=100000, ttl_seconds=3600)
+    _compress_tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    async def start_trace(ride_id: str, bike_id: str, source_coords: List[float]):
+        """Open the trace for a ride, starting at its source"""
+        # The source has no device time; 0 orders it before any telemetry
+        point = [source_coords[0], source_coords[1], 0.0]
+        await Database.db[RideTraceService.COLLECTION].update_one(
+            {"_id": ride_id},
+            {
+                "$setOnInsert": {
+                    "bike_id": bike_id,
+                    "points": [point],
+                    "point_count": 1,
+                    "distance_m": 0.0,
+                    "last_point": point,
+                    "compressed": False,
+                    "closed": False,
+                    "created_at": datetime.utcnow()
+                }
+            },
+            upsert=True
+        )
+
+        RideTraceService._ride_by_bike.set(bike_id, ride_id)
+        RideTraceService._last_points.set(ride_id, point)
+
+    @staticmethod
+    def parse_timestamp(value: Any) -> Optional[float]:
+        """
+        A device timestamp as epoch seconds. Accepts seconds or milliseconds
+        (numbers or numeric strings) and ISO-8601 strings; a missing
+        timestamp is stamped with the receive time. Returns None if it cannot
+        be parsed or is further than RIDE_TRACE_MAX_CLOCK_SKEW_SECONDS from
+        the server clock.
+        """
+        now = time.time()
+        if value is None:
+            return now
+
+        try:
+            ts = float(value)
+        except (TypeError, ValueError):
+            if not isinstance(value, str):
+                return None
+            try:
+                parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            ts = parsed.timestamp()
+        else:
+            # Epoch milliseconds
+            if ts > 1e11:
+                ts /= 1000
+
+        if not math.isfinite(ts) or abs(ts - now) > settings.RIDE_TRACE_MAX_CLOCK_SKEW_SECONDS:
+            return None
+        return ts
+
+    @staticmethod
+    async def add_point(bike_id: str, lng: float, lat: float, timestamp: Any = None) -> bool:
+        """
+        Append a telemetry point to the bike's active ride, if it has one
+        Returns True if the point was recorded
+        """
+        ride_id = await RideTraceService._active_ride_for_bike(bike_id)
+        if not ride_id:
+            return False
+
+        ts = RideTraceService.parse_timestamp(timestamp)
+        if ts is None:
+            logger.warning(f"Dropping point for bike {bike_id} with bad timestamp {timestamp!r}")
+            return False
+
+        last_point = await RideTraceService._last_point(ride_id)
+        if last_point is None or ts <= last_point[2]:
+            return False
+
+        # Ignore GPS jitter while standing still so it does not add distance
+        step_m = distance_m(last_point, [lng, lat])
+        if step_m < settings.RIDE_TRACE_MIN_STEP_M:
+            return False
+
+        point = [lng, lat, ts]
+        # The last_point filter keeps the update idempotent if the same
+        # message is delivered twice
+        result = await Database.db[RideTraceService.COLLECTION].update_one(
+            {"_id": ride_id, "closed": {"$ne": True}, "last_point.2": {"$lt": ts}},
+            {
+                "$push": {"points": point},
+                "$inc": {"distance_m": step_m, "point_count": 1},
+                "$set": {"last_point": point}
+            }
+        )
+
+        if result.modified_count == 0:
+            RideTraceService._last_points.delete(ride_id)
+            return False
+
+        RideTraceService._last_points.set(ride_id, point)
+        return True
+
+    @staticmethod
+    async def trace_distance(ride_id: str, destination_coords: List[float]) -> Optional[float]:
+        """
+        Distance in kilometers along a ride's trace, extended to its destination
+        Returns None if no telemetry was received, so callers fall back to routing
+        """
+        trace = await Database.db[RideTraceService.COLLECTION].find_one(
+            {"_id": ride_id},
+            projection={"distance_m": 1, "last_point": 1, "point_count": 1}
+        )
+        if trace is None or trace.get("point_count", 0) <= 1:
+            return None
+
+        return (trace["distance_m"] + distance_m(trace["last_point"], destination_coords)) / 1000
+
+    @staticmethod
+    async def close_trace(
+        ride_id: str,
+        bike_id: Optional[str],
+        destination_coords: List[float],
+        distance_km: Optional[float] = None
+    ):
+        """
+        Close a completed ride's trace at its destination. distance_km is the
+        trace distance the ride was billed with, stored so the two agree
+        even if telemetry arrived while the ride was being completed.
+        """
+        final_point = [destination_coords[0], destination_coords[1], time.time()]
+        changes: Dict[str, Any] = {"closed": True, "last_point": final_point}
+        if distance_km is not None:
+            changes["distance_m"] = distance_km * 1000
+
+        # Closed traces accept no further points
+        await Database.db[RideTraceService.COLLECTION].update_one(
+            {"_id": ride_id, "closed": {"$ne": True}},
+            {
+                "$push": {"points": final_point},
+                "$inc": {"point_count": 1},
+                "$set": changes
+            }
+        )
+
+        if bike_id:
+            RideTraceService._ride_by_bike.set(bike_id, "")
+        RideTraceService._last_points.delete(ride_id)
+
+        # Compression walks the whole trace, so keep it off the completion path
+        task = asyncio.ensure_future(RideTraceService.compress_trace(ride_id))
+        RideTraceService._compress_tasks.add(task)
+        task.add_done_callback(RideTraceService._compress_tasks.discard)
+
+    @staticmethod
+    async def compress_trace(ride_id: str):
+        """Replace a finished trace with its Douglas-Peucker simplification"""
+        try:
+            trace = await Database.db[RideTraceService.COLLECTION].find_one(
+                {"_id": ride_id, "compressed": False},
+                projection={"points": 1}
+            )
+            if trace is None:
+                return
+
+            points = trace["points"]
+            keep = douglas_peucker(
+                project_local([point[:2] for point in points]),
+                settings.RIDE_TRACE_TOLERANCE_M
+            )
+            simplified = [point for point, kept in zip(points, keep) if kept]
+
+            await Database.db[RideTraceService.COLLECTION].update_one(
+                {"_id": ride_id},
+                {
+                    "$set": {
+                        "points": simplified,
+                        "compressed": True,
+                        "raw_point_count": len(points),
+                        "point_count": len(simplified)
+                    }
+                }
+            )
+        except Exception as e:
+            logger.error(f"Error compressing trace for ride {ride_id}: {str(e)}")
+
+    @staticmethod
+    async def get_trace(ride_id: str, tolerance_m: float = 0) -> Optional[Dict[str, Any]]:
+        """Get a ride's trace as a polyline, downsampled to tolerance_m meters"""
+        trace = await Database.db[RideTraceService.COLLECTION].find_one(
+            {"_id": ride_id},
+            projection={"points": 1, "distance_m": 1, "compressed": 1}
+        )
+        if trace is None:
+            return None
+
+        points = trace["points"]
+        if tolerance_m > 0 and len(points) > 2:
+            keep = douglas_peucker(project_local([point[:2] for point in points]), tolerance_m)
+            points = [point for point, kept in zip(points, keep) if kept]
+
+        return {
+            "ride_id": ride_id,
+            "distance_km": trace["distance_m"] / 1000,
+            "compressed": trace.get("compressed", False),
+            "coordinates": [point[:2] for point in points]
+        }
+
+    @staticmethod
+    async def _active_ride_for_bike(bike_id: str) -> Optional[str]:
+        ride_id = RideTraceService._ride_by_bike.get(bike_id)
+        if ride_id is None:
+            ride = await Database.db["rides"].find_one(
+                {"bike_id": bike_id, "status": RideStatus.ACTIVE},
+                projection={"_id": 1}
+            )
+            ride_id = str(ride["_id"]) if ride else ""
+            RideTraceService._ride_by_bike.set(bike_id, ride_id)
+
+        return ride_id or None
+
+    @staticmethod
+    async def _last_point(ride_id: str) -> Optional[List[float]]:
+        last_point = RideTraceService._last_points.get(ride_id)
+        if last_point is None:
+            trace = await Database.db[RideTraceService.COLLECTION].find_one(
+                {"_id": ride_id, "closed": {"$ne": True}},
+                projection={"last_point": 1}
+            )
+            if trace is None:
+                return None
+            last_point = trace["last_point"]
+            RideTraceService._last_points.set(ride_id, last_point)
+
+        return last_point
@@ -0,0 +1,207 @@
+import heapq
+import math
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+from app.core.config import settings
+from app.core.geodesy import EARTH_RADIUS_M, haversine_m, haversine_m_vec
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RoadGraph:
+    """
+    Array-backed road network for offline shortest-path distances.
+
+    A graph lives in a directory of .npy files laid out as a CSR adjacency
+    list, loaded memory-mapped so large extracts are paged in on demand:
+
+        nodes.npy    float64 (N, 2)  [lng, lat] of every node
+        indptr.npy   int64   (N + 1) edges of node i are indptr[i]:indptr[i + 1]
+        indices.npy  int32   (E,)    target node of each edge
+        weights.npy  float32 (E,)    edge length in meters
+
+    build() also writes the per-node terms of the A* heuristic (lng_rad.npy,
+    lat_rad.npy, cos_lat.npy, float64 (N,)); graphs built without them get
+    them computed once at load.
+
+    Queries run A* with a great-circle heuristic, which never overestimates
+    a road distance, so the result is an exact shortest path.
+    """
+    FILES = ("nodes", "indptr", "indices", "weights")
+    HEURISTIC_FILES = ("lng_rad", "lat_rad", "cos_lat")
+
+    _graphs: Dict[str, "RoadGraph"] = {}
+    # Modes with no graph on disk, and when they were last looked for
+    _missing: Dict[str, float] = {}
+
+    def __init__(self, path: str):
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in self.FILES}
+        self.path = path
+        self.nodes = arrays["nodes"]
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.weights = arrays["weights"]
+        self._tree: Optional[STRtree] = None
+        if all(os.path.exists(os.path.join(path, f"{name}.npy")) for name in self.HEURISTIC_FILES):
+            heuristic = {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                for name in self.HEURISTIC_FILES
+            }
+        else:
+            heuristic = self.heuristic_arrays(self.nodes)
+        self._lng_rad = heuristic["lng_rad"]
+        self._lat_rad = heuristic["lat_rad"]
+        self._cos_lat = heuristic["cos_lat"]
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def for_mode(cls, mode: str) -> Optional["RoadGraph"]:
+        """
+        Graph for a travel mode: ROAD_GRAPH_PATH/<mode> if present,
+        otherwise the graph in ROAD_GRAPH_PATH itself
+        A missing graph is looked for again after ROAD_GRAPH_RETRY_SECONDS,
+        so one deployed later is picked up without a restart
+        """
+        if mode in cls._graphs:
+            return cls._graphs[mode]
+
+        checked_at = cls._missing.get(mode)
+        if checked_at is not None and time.monotonic() - checked_at < settings.ROAD_GRAPH_RETRY_SECONDS:
+            return None
+
+        graph = None
+        base = settings.ROAD_GRAPH_PATH
+        for path in (os.path.join(base, mode), base):
+            if base and os.path.exists(os.path.join(path, "nodes.npy")):
+                graph = cls(path)
+                logger.info(f"Loaded {mode} road graph from {path}: {graph.node_count} nodes, {graph.edge_count} edges")
+                break
+
+        if graph is None:
+            if checked_at is None:
+                logger.error(f"No road graph found for mode '{mode}' under '{base}'")
+            cls._missing[mode] = time.monotonic()
+            return None
+
+        cls._missing.pop(mode, None)
+        cls._graphs[mode] = graph
+        return graph
+
+    @staticmethod
+    def heuristic_arrays(nodes) -> Dict[str, np.ndarray]:
+        """Node longitudes and latitudes in radians, and latitude cosines"""
+        lat_rad = np.radians(np.asarray(nodes[:, 1], dtype=np.float64))
+        return {
+            "lng_rad": np.radians(np.asarray(nodes[:, 0], dtype=np.float64)),
+            "lat_rad": lat_rad,
+            "cos_lat": np.cos(lat_rad)
+        }
+
+    @staticmethod
+    def build(
+        path: str,
+        coordinates,
+        edges,
+        lengths=None,
+        bidirectional: bool = True
+    ):
+        """
+        Write a graph directory from node coordinates and (from, to) edges
+        Edge lengths default to the great-circle distance between their nodes
+        """
+        nodes = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if lengths is None:
+            lengths = haversine_m_vec(
+                nodes[edges[:, 0], 0], nodes[edges[:, 0], 1],
+                nodes[edges[:, 1], 0], nodes[edges[:, 1], 1]
+            )
+        lengths = np.asarray(lengths, dtype=np.float64)
+
+        if bidirectional:
+            edges = np.vstack((edges, edges[:, ::-1]))
+            lengths = np.concatenate((lengths, lengths))
+
+        order = np.argsort(edges[:, 0], kind="stable")
+        sources, targets, lengths = edges[order, 0], edges[order, 1], lengths[order]
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(nodes)), out=indptr[1:])
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "nodes.npy"), nodes)
+        np.save(os.path.join(path, "indptr.npy"), indptr)
+        np.save(os.path.join(path, "indices.npy"), targets.astype(np.int32))
+        np.save(os.path.join(path, "weights.npy"), lengths.astype(np.float32))
+        for name, values in RoadGraph.heuristic_arrays(nodes).items():
+            np.save(os.path.join(path, f"{name}.npy"), values)
+
+    def nearest_node(self, lng: float, lat: float) -> Tuple[int, float]:
+        """Snap a point to the closest graph node; returns (node, distance in meters)"""
+        if self._tree is None:
+            self._tree = STRtree(shapely.points(np.asarray(self.nodes)))
+
+        node = int(self._tree.nearest(shapely.Point(lng, lat)))
+        node_lng, node_lat = self.nodes[node]
+        return node, haversine_m(lng, lat, float(node_lng), float(node_lat))
+
+    def shortest_path_m(self, source: int, target: int) -> Optional[float]:
+        """A* shortest path length in meters between two nodes, None if unreachable"""
+        if source == target:
+            return 0.0
+
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        # item() reads a Python float straight from the (memory-mapped) array
+        lng_rad, lat_rad, cos_lat = self._lng_rad.item, self._lat_rad.item, self._cos_lat.item
+        target_lng, target_lat, cos_target = lng_rad(target), lat_rad(target), cos_lat(target)
+        # Shave a hair off the radius so float32 edge weights never undercut it
+        diameter = 2 * EARTH_RADIUS_M * 0.9999
+        sin, asin, sqrt = math.sin, math.asin, math.sqrt
+
+        def heuristic(node: int) -> float:
+            a = (
+                sin((target_lat - lat_rad(node)) / 2) ** 2
+                + cos_lat(node) * cos_target * sin((target_lng - lng_rad(node)) / 2) ** 2
+            )
+            return diameter * asin(min(1.0, sqrt(a)))
+
+        best = {source: 0.0}
+        heap = [(heuristic(source), 0.0, source)]
+        settled = set()
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                return cost
+            if node in settled:
+                continue
+            settled.add(node)
+
+            start, end = int(indptr[node]), int(indptr[node + 1])
+            for neighbor, weight in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+                new_cost = cost + weight
+                if new_cost < best.get(neighbor, math.inf):
+                    best[neighbor] = new_cost
+                    heapq.heappush(heap, (new_cost + heuristic(neighbor), new_cost, neighbor))
+
+        return None
+
+    def distance_m(self, source_coords: List[float], dest_coords: List[float]) -> Optional[float]:
+        """Road distance in meters between two [lng, lat] points, including the snap to the network"""
+        source, source_snap = self.nearest_node(source_coords[0], source_coords[1])
+        target, target_snap = self.nearest_node(dest_coords[0], dest_coords[1])
+
+        route = self.shortest_path_m(source, target)
+        if route is None:
+            return None
+
+        return source_snap + route + target_snap
@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.core.database import Database
+from app.models.payment import PaymentStatus
+from app.models.ride import RideStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StatsService:
+    """
+    Admin dashboard counters kept in a single stats document. The services
+    adjust them with $inc at each state transition, so the dashboard is one
+    find_one. Counts are recomputed from the collections on startup and
+    every STATS_RECONCILE_INTERVAL_SECONDS to correct any drift, e.g. from
+    a process that died between its write and the increment. Every
+    increment bumps a version, and a recount is only stored if the version
+    is unchanged, so it never overwrites an increment it did not see.
+    """
+    COLLECTION = "stats"
+    DASHBOARD_ID = "dashboard"
+    COUNTERS = ("user_count", "active_rides", "completed_rides", "total_revenue")
+    RECONCILE_ATTEMPTS = 3
+
+    _reconciler: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def increment(**deltas: float):
+        """Apply counter deltas; a failure is logged and left to reconciliation"""
+        try:
+            await Database.db[StatsService.COLLECTION].update_one(
+                {"_id": StatsService.DASHBOARD_ID},
+                {"$inc": {**deltas, "version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error updating dashboard counters {deltas}: {str(e)}")
+
+    @staticmethod
+    async def users_created(count: int = 1):
+        if count:
+            await StatsService.increment(user_count=count)
+
+    @staticmethod
+    async def ride_started():
+        await StatsService.increment(active_rides=1)
+
+    @staticmethod
+    async def ride_completed():
+        await StatsService.increment(active_rides=-1, completed_rides=1)
+
+    @staticmethod
+    async def payment_completed(amount: float):
+        await StatsService.increment(total_revenue=amount)
+
+    @staticmethod
+    async def get_dashboard() -> Dict[str, Any]:
+        """The current counters, computed once if they were never stored"""
+        stats = await Database.db[StatsService.COLLECTION].find_one(
+            {"_id": StatsService.DASHBOARD_ID}
+        )
+        if stats is None:
+            stats = await StatsService.reconcile()
+
+        return {name: stats.get(name, 0) for name in StatsService.COUNTERS}
+
+    @staticmethod
+    async def reconcile() -> Dict[str, Any]:
+        """
+        Recompute the counters from the collections and store them
+        Returns the stored counters, which keep their previous values if
+        increments kept landing during every recount
+        """
+        collection = Database.db[StatsService.COLLECTION]
+        for _ in range(StatsService.RECONCILE_ATTEMPTS):
+            current = await collection.find_one(
+                {"_id": StatsService.DASHBOARD_ID}, projection={"version": 1}
+            )
+            stats = await StatsService._count()
+
+            if current is None:
+                try:
+                    await collection.insert_one({"_id": StatsService.DASHBOARD_ID, "version": 0, **stats})
+                    return stats
+                except DuplicateKeyError:
+                    # An increment created the document while we counted
+                    continue
+
+            result = await collection.update_one(
+                {"_id": StatsService.DASHBOARD_ID, "version": current.get("version")},
+                {"$set": stats}
+            )
+            if result.matched_count:
+                return stats
+
+        logger.warning("Dashboard counters changed during every recount; keeping the stored values")
+        return await collection.find_one({"_id": StatsService.DASHBOARD_ID}) or stats
+
+    @staticmethod
+    async def _count() -> Dict[str, Any]:
+        db = Database.db
+        user_count, active_rides, completed_rides, revenue = await asyncio.gather(
+            db["users"].count_documents({}),
+            db["rides"].count_documents({"status": RideStatus.ACTIVE}),
+            db["rides"].count_documents({"status": RideStatus.COMPLETED}),
+            db["payments"].aggregate([
+                {"$match": {"status": PaymentStatus.COMPLETED}},
+                {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
+            ]).to_list(length=1)
+        )
+
+        return {
+            "user_count": user_count,
+            "active_rides": active_rides,
+            "completed_rides": completed_rides,
+            "total_revenue": revenue[0].get("total", 0) if revenue else 0,
+            "updated_at": datetime.utcnow(),
+            "reconciled_at": datetime.utcnow()
+        }
+
+    @staticmethod
+    async def start():
+        """Reconcile now and then periodically; an interval of 0 only reconciles now"""
+        if StatsService._reconciler is not None:
+            return
+
+        StatsService._reconciler = asyncio.ensure_future(StatsService._reconcile_loop())
+
+    @staticmethod
+    async def stop():
+        reconciler = StatsService._reconciler
+        if reconciler is None:
+            return
+
+        reconciler.cancel()
+        await asyncio.gather(reconciler, return_exceptions=True)
+        StatsService._reconciler = None
+
+    @staticmethod
+    async def _reconcile_loop():
+        while True:
+            try:
+                await StatsService.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reconciling dashboard counters: {str(e)}")
+
+            if settings.STATS_RECONCILE_INTERVAL_SECONDS <= 0:
+                return
+            await asyncio.sleep(settings.STATS_RECONCILE_INTERVAL_SECONDS)
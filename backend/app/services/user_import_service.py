@@ -0,0 +1,220 @@
+import asyncio
+import csv
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Set, Tuple
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from app.core.config import settings
+from app.core.database import Database
+from app.core.security import get_password_hash_bulk
+from app.models.user import UserImportRow
+from app.services.stats_service import StatsService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# MongoDB duplicate key error code
+DUPLICATE_KEY = 11000
+
+class UserImportService:
+    """
+    Bulk user onboarding from a streamed CSV or NDJSON body. Rows are
+    processed in chunks: one $in query finds existing emails, passwords are
+    hashed in parallel on the bcrypt process pool (leaving a worker free for
+    logins) and the chunk is written with a single unordered insert_many.
+    """
+
+    @staticmethod
+    async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """Split a streamed body into lines without reading it all into memory"""
+        buffer = b""
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield line.decode("utf-8-sig").rstrip("\r")
+        if buffer:
+            yield buffer.decode("utf-8-sig").rstrip("\r")
+
+    @staticmethod
+    async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[List[str]]:
+        """
+        Parse CSV records from lines. A quoted field may contain newlines, so
+        lines are collected until their quotes balance and then handed to
+        csv.reader together; blank records are skipped
+        """
+        pending: List[str] = []
+        quotes = 0
+        async for line in lines:
+            pending.append(line + "\n")
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+
+            values = next(csv.reader(pending), [])
+            pending, quotes = [], 0
+            if any(value.strip() for value in values):
+                yield values
+
+        if pending:
+            # An unterminated quote runs to the end of the body
+            yield next(csv.reader(pending), [])
+
+    @staticmethod
+    async def iter_rows(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Parse lines into (row number, fields) pairs; fields is a dict, or an
+        error message for a row that cannot be parsed
+        CSV bodies start with a header row naming the columns
+        """
+        row_number = 0
+        if fmt == "csv":
+            header = None
+            async for values in UserImportService.iter_csv_records(lines):
+                if header is None:
+                    header = [name.strip() for name in values]
+                    continue
+                row_number += 1
+                if len(values) != len(header):
+                    yield row_number, f"Expected {len(header)} columns, got {len(values)}"
+                else:
+                    yield row_number, dict(zip(header, values))
+            return
+
+        async for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                fields = json.loads(line)
+            except ValueError as e:
+                yield row_number, f"Invalid JSON: {str(e)}"
+                continue
+            yield row_number, fields if isinstance(fields, dict) else "Expected a JSON object"
+
+    @staticmethod
+    async def import_users(rows: AsyncIterator[Tuple[int, Any]]) -> Dict[str, Any]:
+        """
+        Create users from parsed rows; returns a per-row report
+        Uploads longer than USER_IMPORT_MAX_ROWS stop there and are marked truncated
+        """
+        report: List[Dict[str, Any]] = []
+        seen: Set[str] = set()
+        chunk: List[Tuple[int, Any]] = []
+
+        truncated = False
+
+        async for row in rows:
+            if len(report) + len(chunk) >= settings.USER_IMPORT_MAX_ROWS:
+                # Rows past the limit are not read; earlier chunks are already written
+                truncated = True
+                break
+            chunk.append(row)
+            if len(chunk) >= settings.USER_IMPORT_CHUNK_SIZE:
+                report.extend(await UserImportService._import_chunk(chunk, seen))
+                chunk = []
+        if chunk:
+            report.extend(await UserImportService._import_chunk(chunk, seen))
+
+        created = sum(1 for result in report if result["status"] == "created")
+        return {
+            "total": len(report),
+            "created": created,
+            "failed": len(report) - created,
+            "truncated": truncated,
+            "rows": report
+        }
+
+    @staticmethod
+    async def _import_chunk(chunk: List[Tuple[int, Any]], seen: Set[str]) -> List[Dict[str, Any]]:
+        results: Dict[int, Dict[str, Any]] = {}
+        valid: List[Tuple[int, UserImportRow]] = []
+
+        for row_number, fields in chunk:
+            if isinstance(fields, str):
+                results[row_number] = {"row": row_number, "status": "invalid", "error": fields}
+                continue
+            try:
+                user = UserImportRow(**fields)
+            except ValidationError as e:
+                results[row_number] = {
+                    "row": row_number,
+                    "email": fields.get("email"),
+                    "status": "invalid",
+                    "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                }
+                continue
+
+            # Repeats within the upload count as duplicates of the first row
+            if user.email in seen:
+                results[row_number] = {"row": row_number, "email": user.email, "status": "duplicate"}
+                continue
+            seen.add(user.email)
+            valid.append((row_number, user))
+
+        # One query for the whole chunk instead of a find_one per user
+        existing = set()
+        if valid:
+            cursor = Database.db["users"].find(
+                {"email": {"$in": [user.email for _, user in valid]}},
+                projection={"email": 1, "_id": 0}
+            )
+            existing = {user["email"] async for user in cursor}
+
+        to_create = []
+        for row_number, user in valid:
+            if user.email in existing:
+                results[row_number] = {"row": row_number, "email": user.email, "status": "duplicate"}
+            else:
+                to_create.append((row_number, user))
+
+        if to_create:
+            # Bounded by the PasswordHasher bulk semaphore, which keeps one
+            # worker free for interactive logins
+            hashes = await asyncio.gather(*[get_password_hash_bulk(user.password) for _, user in to_create])
+            now = datetime.utcnow()
+            documents = [
+                {
+                    "email": user.email,
+                    "phone": user.phone,
+                    "full_name": user.full_name,
+                    "password": password_hash,
+                    "documents": [],
+                    "is_active": True,
+                    "is_admin": False,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for (_, user), password_hash in zip(to_create, hashes)
+            ]
+
+            failed: Dict[int, Dict[str, Any]] = {}
+            try:
+                await Database.db["users"].insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+
+            for index, ((row_number, user), document) in enumerate(zip(to_create, documents)):
+                error = failed.get(index)
+                if error is None:
+                    results[row_number] = {
+                        "row": row_number,
+                        "email": user.email,
+                        "status": "created",
+                        "user_id": str(document["_id"])
+                    }
+                elif error.get("code") == DUPLICATE_KEY:
+                    results[row_number] = {"row": row_number, "email": user.email, "status": "duplicate"}
+                else:
+                    results[row_number] = {
+                        "row": row_number,
+                        "email": user.email,
+                        "status": "error",
+                        "error": error.get("errmsg", "Insert failed")
+                    }
+
+        await StatsService.users_created(
+            sum(1 for row_number, _ in chunk if results[row_number]["status"] == "created")
+        )
+        return [results[row_number] for row_number, _ in chunk]
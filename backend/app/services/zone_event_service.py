@@ -0,0 +1,140 @@
+import time
+from bson import ObjectId
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from app.core.database import Database
+from app.mqtt.client import MQTTClient
+from app.services.ride_trace_service import RideTraceService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# MongoDB duplicate key error code
+DUPLICATE_KEY = 11000
+
+class ZoneEventService:
+    """
+    Streaming zone enter/exit detector for bike telemetry. Each bike's
+    current zone lives on its bike document (current_zone_id, with
+    current_zone_ts the telemetry time of the last change) and is moved
+    with a conditional update, so when several workers or a redelivered
+    message see the same transition exactly one of them records and
+    publishes its events. Events are also unique on (bike_id, ts, event)
+    as a second guard.
+    """
+    EVENTS_TOPIC = "zones/{zone_id}/events"
+    
+    @staticmethod
+    async def process_location(
+        bike_id: str,
+        lng: float,
+        lat: float,
+        zone_id: Optional[str],
+        timestamp: Any = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Feed one telemetry position with the zone it falls in (or None)
+        Returns the events emitted for this position
+        """
+        ts = RideTraceService.parse_timestamp(timestamp)
+        if ts is None:
+            ts = time.time()
+        
+        # Matches only if the bike is elsewhere and this message is newer than
+        # the last change, so repeats and stale redeliveries are no-ops
+        previous = await Database.db["bikes"].find_one_and_update(
+            {
+                "_id": ObjectId(bike_id),
+                "current_zone_id": {"$ne": zone_id},
+                "current_zone_ts": {"$not": {"$gte": ts}}
+            },
+            {"$set": {"current_zone_id": zone_id, "current_zone_ts": ts}},
+            projection={"current_zone_id": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous is None:
+            return []
+        
+        if "current_zone_id" in previous:
+            previous_zone_id = previous["current_zone_id"]
+        else:
+            # Bikes tracked before current_zone_id was stored
+            previous_zone_id = await ZoneEventService._restore_last_zone(bike_id)
+            if previous_zone_id == zone_id:
+                return []
+        
+        now = datetime.utcnow()
+        events = []
+        if previous_zone_id:
+            events.append(ZoneEventService._event(bike_id, previous_zone_id, "exit", lng, lat, ts, now))
+        if zone_id:
+            events.append(ZoneEventService._event(bike_id, zone_id, "enter", lng, lat, ts, now))
+        
+        events = await ZoneEventService._insert_new(events)
+        
+        mqtt_client = MQTTClient()
+        for event in events:
+            mqtt_client.publish(
+                ZoneEventService.EVENTS_TOPIC.format(zone_id=event["zone_id"]),
+                {
+                    "bike_id": event["bike_id"],
+                    "zone_id": event["zone_id"],
+                    "event": event["event"],
+                    "coordinates": event["coordinates"],
+                    "timestamp": event["created_at"].isoformat()
+                }
+            )
+        
+        return events
+    
+    @staticmethod
+    async def _insert_new(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert events, returning only those that were not already recorded"""
+        if not events:
+            return []
+        
+        try:
+            await Database.db["zone_events"].insert_many([dict(event) for event in events], ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+            duplicates = {error["index"] for error in errors}
+            return [event for index, event in enumerate(events) if index not in duplicates]
+        
+        return events
+    
+    @staticmethod
+    async def _restore_last_zone(bike_id: str) -> Optional[str]:
+        """Recover a bike's zone from its latest event"""
+        last_event = await Database.db["zone_events"].find_one(
+            {"bike_id": bike_id},
+            projection={"zone_id": 1, "event": 1},
+            sort=[("created_at", -1)]
+        )
+        
+        if last_event and last_event["event"] == "enter":
+            return last_event["zone_id"]
+        
+        return None
+    
+    @staticmethod
+    def _event(
+        bike_id: str,
+        zone_id: str,
+        event: str,
+        lng: float,
+        lat: float,
+        ts: float,
+        now: datetime
+    ) -> Dict[str, Any]:
+        return {
+            "bike_id": bike_id,
+            "zone_id": zone_id,
+            "event": event,
+            "coordinates": [lng, lat],
+            "ts": ts,
+            "created_at": now
+        }
@@ -0,0 +1,290 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple, Any
+import math
+import numpy as np
+import shapely
+from shapely.errors import GEOSException
+from shapely.geometry import shape
+from shapely.strtree import STRtree
+from app.core.config import settings
+from app.core.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Grid cell marker for cells that straddle a zone boundary. Cells that are
+# fully inside a zone store that zone's index; cells outside every zone are
+# simply absent from the grid.
+BOUNDARY_CELL = -1
+
+class ZoneIndex:
+    """
+    Process-wide spatial index over the parking_zones collection.
+    Zone geometries are parsed and prepared once, and point lookups go
+    through an STRtree instead of scanning every zone.
+
+    On top of the tree, a precomputed lat/lng grid classifies every cell as
+    inside a single zone, outside all zones or on a boundary, so most
+    lookups are answered with one dict access.
+
+    Zones created by another worker are picked up by a background refresh
+    that reloads the index whenever the collection's zone count or newest
+    _id changes.
+    """
+    grid_cell_size: float = settings.GEOFENCE_GRID_CELL_SIZE
+    grid_max_cells: int = settings.GEOFENCE_GRID_MAX_CELLS
+
+    _zones: List[Dict[str, Any]] = []
+    _geometries: List[Any] = []
+    _tree: Optional[STRtree] = None
+    _grid: Optional[Dict[Tuple[int, int], int]] = None
+    _grid_hits = 0
+    _grid_fallbacks = 0
+    _loaded = False
+    # (zone count, newest zone _id) of the collection as last loaded
+    _signature: Optional[Tuple[int, Any]] = None
+    _refresher: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def warm(cls):
+        """Load every parking zone from the database into the index"""
+        # Taken before the read, so a zone inserted meanwhile triggers a reload
+        signature = await cls._collection_signature()
+        zones = await Database.db["parking_zones"].find().to_list(length=None)
+        cls.load(zones)
+        cls._signature = signature
+        logger.info(f"Zone index warmed with {len(cls._zones)} parking zones")
+
+    @classmethod
+    async def refresh(cls) -> bool:
+        """Reload the index if zones were added or removed since it was loaded"""
+        if cls._loaded and await cls._collection_signature() == cls._signature:
+            return False
+
+        await cls.warm()
+        return True
+
+    @classmethod
+    def start_refresh(cls):
+        """Refresh every ZONE_INDEX_REFRESH_SECONDS in the background; 0 disables"""
+        if cls._refresher is None and settings.ZONE_INDEX_REFRESH_SECONDS > 0:
+            cls._refresher = asyncio.ensure_future(cls._refresh_loop())
+
+    @classmethod
+    async def stop_refresh(cls):
+        refresher = cls._refresher
+        if refresher is None:
+            return
+
+        refresher.cancel()
+        await asyncio.gather(refresher, return_exceptions=True)
+        cls._refresher = None
+
+    @classmethod
+    def load(cls, zones: List[Dict[str, Any]]):
+        """Replace the indexed zones with the given zone documents"""
+        cls._zones = []
+        cls._geometries = []
+        for zone in zones:
+            cls._append(zone)
+        cls._rebuild()
+        cls._build_grid()
+        cls._loaded = True
+
+    @classmethod
+    def add_zone(cls, zone: Dict[str, Any]):
+        """Add a single newly created zone without reloading the collection"""
+        if cls._signature is not None:
+            # Inserting the zone moved the collection to this signature
+            count, _ = cls._signature
+            cls._signature = (count + 1, zone["_id"])
+        if not cls._append(zone):
+            return
+        cls._rebuild()
+        # The new zone has the highest index, so existing cells never change
+        # owner; only the cells it touches need to be classified
+        if cls._grid is not None and not cls._grid_add(len(cls._geometries) - 1):
+            cls._disable_grid()
+
+    @classmethod
+    def is_loaded(cls) -> bool:
+        return cls._loaded
+
+    @classmethod
+    def zones(cls) -> List[Dict[str, Any]]:
+        return cls._zones
+
+    @classmethod
+    def lookup(cls, lng: float, lat: float) -> Optional[Dict[str, Any]]:
+        """
+        Return the first zone (in collection order) containing the point,
+        or None if the point is outside every zone
+        """
+        if cls._tree is None:
+            return None
+
+        if cls._grid is not None:
+            cell = cls._grid.get(cls._cell_key(lng, lat))
+            if cell is None:
+                cls._grid_hits += 1
+                return None
+            if cell != BOUNDARY_CELL:
+                cls._grid_hits += 1
+                return cls._zones[cell]
+            cls._grid_fallbacks += 1
+
+        # Envelope query narrows down to the handful of candidate zones
+        candidates = cls._tree.query(shapely.Point(lng, lat))
+        for idx in sorted(candidates):
+            if shapely.contains_xy(cls._geometries[idx], lng, lat):
+                return cls._zones[idx]
+
+        return None
+
+    @classmethod
+    def lookup_many(cls, coordinates) -> List[Optional[Dict[str, Any]]]:
+        """
+        Vectorized lookup for many [lng, lat] points at once
+        Returns the matching zone (or None) for each point, in input order
+        """
+        coords = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        matches: List[Optional[Dict[str, Any]]] = [None] * len(coords)
+        if cls._tree is None or len(coords) == 0:
+            return matches
+
+        # Bulk envelope query returns (point index, zone index) candidate pairs
+        point_idx, zone_idx = cls._tree.query(shapely.points(coords))
+        if len(point_idx) == 0:
+            return matches
+
+        inside = shapely.contains_xy(
+            cls._tree.geometries[zone_idx],
+            coords[point_idx, 0],
+            coords[point_idx, 1]
+        )
+        point_idx, zone_idx = point_idx[inside], zone_idx[inside]
+
+        # Keep the first zone in collection order per point, like lookup()
+        order = np.lexsort((zone_idx, point_idx))
+        point_idx, zone_idx = point_idx[order], zone_idx[order]
+        _, first = np.unique(point_idx, return_index=True)
+        for p, z in zip(point_idx[first], zone_idx[first]):
+            matches[p] = cls._zones[z]
+
+        return matches
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Grid statistics: cells per class and how often lookups skipped the exact test"""
+        cells = list(cls._grid.values()) if cls._grid is not None else []
+        boundary = sum(1 for cell in cells if cell == BOUNDARY_CELL)
+        lookups = cls._grid_hits + cls._grid_fallbacks
+        return {
+            "zones": len(cls._zones),
+            "grid_cell_size": cls.grid_cell_size if cls._grid is not None else None,
+            "interior_cells": len(cells) - boundary,
+            "boundary_cells": boundary,
+            "grid_hits": cls._grid_hits,
+            "grid_fallbacks": cls._grid_fallbacks,
+            "grid_hit_rate": cls._grid_hits / lookups if lookups else None
+        }
+
+    @classmethod
+    def reset_stats(cls):
+        cls._grid_hits = 0
+        cls._grid_fallbacks = 0
+
+    @classmethod
+    async def _collection_signature(cls) -> Tuple[int, Any]:
+        collection = Database.db["parking_zones"]
+        count, newest = await asyncio.gather(
+            collection.count_documents({}),
+            collection.find_one({}, projection={"_id": 1}, sort=[("_id", -1)])
+        )
+        return count, newest["_id"] if newest else None
+
+    @classmethod
+    async def _refresh_loop(cls):
+        while True:
+            await asyncio.sleep(settings.ZONE_INDEX_REFRESH_SECONDS)
+            try:
+                await cls.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error refreshing zone index: {str(e)}")
+
+    @classmethod
+    def _append(cls, zone: Dict[str, Any]) -> bool:
+        try:
+            # shape() handles Polygons with holes as well as MultiPolygons
+            geometry = shape(zone["geometry"])
+        except (KeyError, TypeError, ValueError, GEOSException) as e:
+            logger.error(f"Skipping parking zone {zone.get('_id')} with invalid geometry: {str(e)}")
+            return False
+
+        shapely.prepare(geometry)
+        cls._zones.append(zone)
+        cls._geometries.append(geometry)
+        return True
+
+    @classmethod
+    def _rebuild(cls):
+        # STRtree is immutable, but rebuilding it over already prepared
+        # geometries is cheap compared to re-parsing every zone
+        cls._tree = STRtree(cls._geometries) if cls._geometries else None
+
+    @classmethod
+    def _cell_key(cls, lng: float, lat: float) -> Tuple[int, int]:
+        return math.floor(lng / cls.grid_cell_size), math.floor(lat / cls.grid_cell_size)
+
+    @classmethod
+    def _build_grid(cls):
+        cls._grid = None
+        if cls.grid_cell_size <= 0:
+            return
+
+        cls._grid = {}
+        for idx in range(len(cls._geometries)):
+            if not cls._grid_add(idx):
+                cls._disable_grid()
+                return
+
+    @classmethod
+    def _disable_grid(cls):
+        logger.warning(
+            f"Zone grid exceeds {cls.grid_max_cells} cells at cell size "
+            f"{cls.grid_cell_size}; falling back to tree lookups only"
+        )
+        cls._grid = None
+
+    @classmethod
+    def _grid_add(cls, idx: int) -> bool:
+        """
+        Classify the cells covered by zone idx. Zones are added in collection
+        order, so a cell already owned by an earlier zone keeps that owner.
+        Returns False if the grid would grow past grid_max_cells.
+        """
+        geometry = cls._geometries[idx]
+        if geometry.is_empty:
+            return True
+
+        size = cls.grid_cell_size
+        min_x, min_y, max_x, max_y = geometry.bounds
+        xs = np.arange(math.floor(min_x / size), math.floor(max_x / size) + 1)
+        ys = np.arange(math.floor(min_y / size), math.floor(max_y / size) + 1)
+        if len(cls._grid) + len(xs) * len(ys) > cls.grid_max_cells:
+            return False
+
+        cell_x, cell_y = (a.ravel() for a in np.meshgrid(xs, ys))
+        cells = shapely.box(cell_x * size, cell_y * size, (cell_x + 1) * size, (cell_y + 1) * size)
+        interior = shapely.contains_properly(geometry, cells)
+        touching = shapely.intersects(geometry, cells)
+
+        for x, y, inside, touches in zip(cell_x.tolist(), cell_y.tolist(), interior, touching):
+            # Cells already owned by (or straddling) an earlier zone keep
+            # their class: the earlier zone wins wherever it applies
+            if touches and (x, y) not in cls._grid:
+                cls._grid[(x, y)] = idx if inside else BOUNDARY_CELL
+
+        return True
@@ -0,0 +1,118 @@
+"""
+Compare one Distance Matrix call per lookup against the micro-batcher in
+GoogleMapsService, using a local stub of the API that enforces the request
+limits and counts calls and billed elements. Simulates a rush-hour burst
+of ride completions between a handful of station zones, and a burst of
+trips between points that never repeat, where only packing unrelated
+lookups (DISTANCE_BATCH_MAX_ELEMENT_RATIO > 1) saves calls. Run from the
+backend directory:
+
+    python -m benchmarks.distance_batching --lookups 500 --delay 0.05
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+from aiohttp import web
+
+from app.core.config import settings
+from app.core.geodesy import haversine_m
+from app.core.http_client import HTTPClient
+from app.services.google_maps_service import GoogleMapsService
+
+STATIONS = [
+    [77.5945 + 0.01 * (i % 6), 12.9715 + 0.01 * (i // 6)]
+    for i in range(30)
+]
+
+def start_stub_server(delay: float, counters: dict):
+    """Stub Distance Matrix API on its own thread, answering haversine distances"""
+    async def distance_matrix(request):
+        origins = request.query["origins"].split("|")
+        destinations = request.query["destinations"].split("|")
+        counters["requests"] += 1
+        counters["elements"] += len(origins) * len(destinations)
+        await asyncio.sleep(delay)
+
+        if (
+            len(origins) > GoogleMapsService.MAX_ORIGINS
+            or len(destinations) > GoogleMapsService.MAX_DESTINATIONS
+            or len(origins) * len(destinations) > GoogleMapsService.MAX_ELEMENTS
+        ):
+            return web.json_response({"status": "MAX_ELEMENTS_EXCEEDED"})
+
+        rows = []
+        for origin in origins:
+            o_lat, o_lng = map(float, origin.split(","))
+            elements = []
+            for destination in destinations:
+                d_lat, d_lng = map(float, destination.split(","))
+                meters = round(haversine_m(o_lng, o_lat, d_lng, d_lat) * 1.3)
+                elements.append({"status": "OK", "distance": {"value": meters}})
+            rows.append({"elements": elements})
+        return web.json_response({"status": "OK", "rows": rows})
+
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_get("/maps/api/distancematrix/json", distance_matrix)
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}/maps/api"
+
+async def burst(lookups):
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        GoogleMapsService._request_distance(source, dest, "driving")
+        for source, dest in lookups
+    ])
+    return results, time.perf_counter() - start
+
+def random_point():
+    return [round(77.55 + random.random() * 0.1, 5), round(12.93 + random.random() * 0.1, 5)]
+
+async def run(base_url: str, counters: dict, count: int, ratios: list):
+    GoogleMapsService.API_BASE_URL = base_url
+    settings.GOOGLE_MAPS_API_KEY = "benchmark"
+    random.seed(42)
+    workloads = {
+        "stations": [tuple(random.sample(STATIONS, 2)) for _ in range(count)],
+        "distinct": [(random_point(), random_point()) for _ in range(count)]
+    }
+    await HTTPClient.open()
+
+    print(f"lookups={count} stations={len(STATIONS)}")
+    print(f"{'workload':>9} {'mode':>14} {'requests':>9} {'elements':>9} {'wall ms':>9}")
+    for workload, lookups in workloads.items():
+        baseline = None
+        modes = [("unbatched", 0, 1)] + [(f"batched x{ratio:g}", 20, ratio) for ratio in ratios]
+        for label, window_ms, ratio in modes:
+            settings.DISTANCE_BATCH_WINDOW_MS = window_ms
+            settings.DISTANCE_BATCH_MAX_ELEMENT_RATIO = ratio
+            counters.update(requests=0, elements=0)
+            results, seconds = await burst(lookups)
+            assert None not in results, "some lookups failed"
+            if baseline is None:
+                baseline = results
+            assert results == baseline, "batched distances differ from unbatched ones"
+            print(f"{workload:>9} {label:>14} {counters['requests']:>9} {counters['elements']:>9} {seconds * 1000:>9.0f}")
+
+    await HTTPClient.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--ratios", type=float, nargs="+", default=[1, 2, 4],
+                        help="DISTANCE_BATCH_MAX_ELEMENT_RATIO values to compare")
+    args = parser.parse_args()
+    counters = {"requests": 0, "elements": 0}
+    # The stub gets its own loop, so start it before the benchmark's loop
+    stub_url = start_stub_server(args.delay, counters)
+    asyncio.run(run(stub_url, counters, args.lookups, args.ratios))
@@ -0,0 +1,76 @@
+"""
+Compare per-point validate_parking_location calls against the vectorized
+batch classifier. Run from the backend directory:
+
+    python -m benchmarks.geofence_batch --zones 3000 --points 20000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.services.geofencing_service import GeofencingService
+from app.services.zone_index import ZoneIndex
+
+# Roughly the Bengaluru area used by the sample data in init_db.py
+MIN_LNG, MAX_LNG = 77.45, 77.75
+MIN_LAT, MAX_LAT = 12.85, 13.10
+
+def make_zones(count: int, size: float = 0.002):
+    zones = []
+    for i in range(count):
+        lng = random.uniform(MIN_LNG, MAX_LNG - size)
+        lat = random.uniform(MIN_LAT, MAX_LAT - size)
+        zones.append({
+            "_id": f"zone-{i}",
+            "name": f"Zone {i}",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[
+                    [lng, lat],
+                    [lng, lat + size],
+                    [lng + size, lat + size],
+                    [lng + size, lat],
+                    [lng, lat]
+                ]]
+            },
+            "properties": {}
+        })
+    return zones
+
+def make_points(count: int):
+    return [
+        [random.uniform(MIN_LNG, MAX_LNG), random.uniform(MIN_LAT, MAX_LAT)]
+        for _ in range(count)
+    ]
+
+async def run(zone_count: int, point_count: int):
+    random.seed(42)
+    ZoneIndex.load(make_zones(zone_count))
+    points = make_points(point_count)
+
+    start = time.perf_counter()
+    looped = []
+    for lng, lat in points:
+        result = await GeofencingService.validate_parking_location(lat, lng)
+        looped.append(result.get("zone_id"))
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = await GeofencingService.classify_points(points)
+    batch_seconds = time.perf_counter() - start
+
+    assert looped == batched, "batch classification disagrees with per-point validation"
+
+    inside = sum(1 for zone_id in batched if zone_id is not None)
+    print(f"zones={zone_count} points={point_count} inside={inside}")
+    print(f"per-point loop: {loop_seconds * 1000:.1f} ms ({point_count / loop_seconds:,.0f} points/s)")
+    print(f"vectorized:     {batch_seconds * 1000:.1f} ms ({point_count / batch_seconds:,.0f} points/s)")
+    print(f"speedup:        {loop_seconds / batch_seconds:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--zones", type=int, default=3000)
+    parser.add_argument("--points", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.zones, args.points))
@@ -0,0 +1,67 @@
+"""
+Measure how often the zone lookup grid answers a parking check without an
+exact polygon test, using the sample zones from init_db.py. Run from the
+backend directory:
+
+    python -m benchmarks.geofence_grid --points 100000
+"""
+import argparse
+import random
+import time
+
+from init_db import PARKING_ZONES
+from app.services.zone_index import ZoneIndex
+
+CELL_SIZES = [0.004, 0.002, 0.001, 0.0005, 0.00025]
+
+def sample_points(zones, count: int, margin: float = 0.5):
+    """Uniform points over the zones' bounding box, padded by margin on each side"""
+    coords = [c for zone in zones for c in zone["geometry"]["coordinates"][0]]
+    min_lng = min(c[0] for c in coords)
+    max_lng = max(c[0] for c in coords)
+    min_lat = min(c[1] for c in coords)
+    max_lat = max(c[1] for c in coords)
+    pad_lng = (max_lng - min_lng) * margin
+    pad_lat = (max_lat - min_lat) * margin
+    return [
+        (
+            random.uniform(min_lng - pad_lng, max_lng + pad_lng),
+            random.uniform(min_lat - pad_lat, max_lat + pad_lat)
+        )
+        for _ in range(count)
+    ]
+
+def time_lookups(points):
+    start = time.perf_counter()
+    for lng, lat in points:
+        ZoneIndex.lookup(lng, lat)
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+def run(point_count: int):
+    random.seed(42)
+    zones = [dict(zone, _id=f"zone-{i}") for i, zone in enumerate(PARKING_ZONES)]
+    points = sample_points(zones, point_count)
+
+    ZoneIndex.grid_cell_size = 0
+    ZoneIndex.load(zones)
+    baseline = time_lookups(points)
+    print(f"zones={len(zones)} points={point_count}")
+    print(f"{'cell size':>10} {'interior':>9} {'boundary':>9} {'hit rate':>9} {'us/lookup':>10}")
+    print(f"{'no grid':>10} {'-':>9} {'-':>9} {'-':>9} {baseline:>10.2f}")
+
+    for cell_size in CELL_SIZES:
+        ZoneIndex.grid_cell_size = cell_size
+        ZoneIndex.load(zones)
+        ZoneIndex.reset_stats()
+        per_lookup = time_lookups(points)
+        stats = ZoneIndex.stats()
+        print(
+            f"{cell_size:>10} {stats['interior_cells']:>9} {stats['boundary_cells']:>9} "
+            f"{stats['grid_hit_rate']:>9.1%} {per_lookup:>10.2f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100000)
+    args = parser.parse_args()
+    run(args.points)
@@ -0,0 +1,88 @@
+"""
+Show that concurrent external API calls no longer serialize on the event
+loop. A local stub of the Distance Matrix API answers every request after a
+fixed delay; N concurrent calculate_distance calls should finish in about
+one delay with the pooled async client, versus N delays with a blocking
+client. Run from the backend directory:
+
+    python -m benchmarks.http_concurrency --requests 20 --delay 0.2
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from aiohttp import web
+
+from app.core.config import settings
+from app.core.http_client import HTTPClient
+from app.services.google_maps_service import GoogleMapsService
+
+def start_stub_server(delay: float):
+    """Run a stub Distance Matrix API on its own thread and event loop"""
+    async def distance_matrix(request):
+        await asyncio.sleep(delay)
+        return web.json_response({
+            "status": "OK",
+            "rows": [{"elements": [{"status": "OK", "distance": {"value": 1234}}]}]
+        })
+
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_get("/maps/api/distancematrix/json", distance_matrix)
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}/maps/api"
+
+async def blocking_calculate_distance(base_url: str, source, dest):
+    """The previous behaviour: a synchronous HTTP call inside a coroutine"""
+    query = urllib.parse.urlencode({
+        "origins": f"{source[1]},{source[0]}",
+        "destinations": f"{dest[1]},{dest[0]}",
+        "mode": "driving",
+        "key": settings.GOOGLE_MAPS_API_KEY
+    })
+    with urllib.request.urlopen(f"{base_url}/distancematrix/json?{query}") as response:
+        data = json.loads(response.read())
+    return data["rows"][0]["elements"][0]["distance"]["value"] / 1000
+
+async def run(base_url: str, count: int, delay: float):
+    GoogleMapsService.API_BASE_URL = base_url
+    settings.GOOGLE_MAPS_API_KEY = "benchmark"
+    source, dest = [77.5945, 12.9715], [77.6245, 12.9815]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[blocking_calculate_distance(base_url, source, dest) for _ in range(count)])
+    blocking_seconds = time.perf_counter() - start
+
+    await HTTPClient.open()
+    start = time.perf_counter()
+    results = await asyncio.gather(*[GoogleMapsService.calculate_distance(source, dest) for _ in range(count)])
+    pooled_seconds = time.perf_counter() - start
+    await HTTPClient.close()
+
+    assert all(result == 1.234 for result in results), "unexpected distance from stub"
+
+    print(f"requests={count} stub delay={delay * 1000:.0f} ms")
+    print(f"blocking client: {blocking_seconds * 1000:.0f} ms")
+    print(f"pooled client:   {pooled_seconds * 1000:.0f} ms")
+
+    # Serialized calls take count * delay; concurrent ones roughly one delay
+    assert pooled_seconds < delay * count / 2, "concurrent requests were serialized"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+    # The stub gets its own loop, so start it before the benchmark's loop
+    stub_url = start_stub_server(args.delay)
+    asyncio.run(run(stub_url, args.requests, args.delay))
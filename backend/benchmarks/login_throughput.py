@@ -0,0 +1,77 @@
+"""
+Concurrent login load: bcrypt verification inline on the event loop versus
+on the PasswordHasher process pool. Reports login throughput, latency and
+how long the event loop stalls meanwhile. Run from the backend directory:
+
+    python -m benchmarks.login_throughput --logins 32 --concurrency 16
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.security import PasswordHasher, pwd_context, verify_password, verify_password_async
+
+PASSWORD = "correct horse battery staple"
+
+async def login(hashed: str, pooled: bool) -> float:
+    start = time.perf_counter()
+    # Stand-in for the user lookup round trip
+    await asyncio.sleep(0.002)
+    if pooled:
+        ok = await verify_password_async(PASSWORD, hashed)
+    else:
+        ok = verify_password(PASSWORD, hashed)
+    assert ok
+    return time.perf_counter() - start
+
+async def probe_loop_lag(lags: list, stop: asyncio.Event, interval: float = 0.01):
+    # Another request's view of the server: how late a 10 ms timer fires
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+async def run_mode(hashed: str, logins: int, concurrency: int, pooled: bool):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with limit:
+            return await login(hashed, pooled)
+
+    lags = []
+    stop = asyncio.Event()
+    probe = asyncio.ensure_future(probe_loop_lag(lags, stop))
+
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*[limited() for _ in range(logins)]))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    lags.sort()
+
+    name = "pool" if pooled else "inline"
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"{name:>6}: {logins / elapsed:6.2f} logins/s  "
+          f"p50 {latencies[len(latencies) // 2] * 1000:7.0f} ms  p99 {p99 * 1000:7.0f} ms  "
+          f"max loop stall {lags[-1] * 1000 if lags else elapsed * 1000:7.0f} ms")
+
+async def main(logins: int, concurrency: int, rounds: int):
+    hashed = pwd_context.copy(bcrypt__rounds=rounds).hash(PASSWORD)
+    PasswordHasher.open()
+    # Spin the workers up before timing
+    await verify_password_async(PASSWORD, hashed)
+
+    print(f"logins={logins} concurrency={concurrency} bcrypt rounds={rounds} "
+          f"pool workers={PasswordHasher.executor._max_workers}")
+    await run_mode(hashed, logins, concurrency, pooled=False)
+    await run_mode(hashed, logins, concurrency, pooled=True)
+    PasswordHasher.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency, args.rounds))
@@ -0,0 +1,242 @@
+"""
+MongoDB commands issued per API call, for comparing commits. Each write
+endpoint is called the way the routers call it, and the commands issued
+until it returns are counted; background work (trace compression) is left
+out. Run from the backend directory, on any commit:
+
+    python -m benchmarks.mongo_round_trips --url mongodb://localhost:27017
+
+Against a mongod, commands are counted with pymongo command monitoring.
+Without one, --mongomock runs the same calls on an in-memory mongomock
+database (pip install mongomock) and counts driver operations, each of
+which is one command on a real server.
+"""
+import argparse
+import asyncio
+import inspect
+from collections import Counter
+
+from bson import ObjectId
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.core.database import Database
+from app.models.payment import PaymentCreate, PaymentMethod, PaymentProcess
+from app.models.ride import Location, RideComplete, RideCreate, RideStart
+from app.api.payments import router as payments_api
+from app.api.rides import router as rides_api
+from app.services.geofencing_service import GeofencingService
+from app.services.penalty_service import PenaltyService
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+COUNTER = CommandCounter()
+
+# Wire command issued by each collection method
+COMMANDS = {
+    "find_one": "find", "find": "find", "aggregate": "aggregate",
+    "count_documents": "aggregate", "distinct": "distinct",
+    "insert_one": "insert", "insert_many": "insert",
+    "update_one": "update", "update_many": "update", "replace_one": "update",
+    "delete_one": "delete", "delete_many": "delete",
+    "find_one_and_update": "findAndModify", "find_one_and_replace": "findAndModify",
+    "find_one_and_delete": "findAndModify", "create_index": "createIndexes",
+    "create_indexes": "createIndexes"
+}
+
+class MockCursor:
+    """Async view of a mongomock cursor; the first fetch counts as one command"""
+    def __init__(self, cursor, command: str):
+        self._cursor = cursor
+        self._command = command
+        self._iterator = None
+
+    def __getattr__(self, name):
+        attribute = getattr(self._cursor, name)
+        if not callable(attribute):
+            return attribute
+
+        def chain(*args, **kwargs):
+            attribute(*args, **kwargs)
+            return self
+        return chain
+
+    def _fetch(self):
+        if self._iterator is None:
+            COUNTER.commands[self._command] += 1
+            self._iterator = iter(self._cursor)
+        return self._iterator
+
+    async def to_list(self, length=None):
+        documents = list(self._fetch())
+        return documents if length is None else documents[:length]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._fetch())
+        except StopIteration:
+            raise StopAsyncIteration
+
+class MockCollection:
+    """Async view of a mongomock collection counting the commands it would send"""
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        command = COMMANDS.get(name)
+        if command is None:
+            return attribute
+
+        if name in ("find", "aggregate"):
+            def cursor(*args, **kwargs):
+                kwargs.pop("batch_size", None)
+                return MockCursor(attribute(*args, **kwargs), command)
+            return cursor
+
+        async def call(*args, **kwargs):
+            COUNTER.commands[command] += 1
+            return attribute(*args, **kwargs)
+        return call
+
+class MockDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name):
+        return MockCollection(self._database[name])
+
+    def __getattr__(self, name):
+        return MockCollection(self._database[name])
+
+POINT = [77.5995, 12.9765]
+ZONE = {
+    "name": "Benchmark Zone",
+    "geometry": {"type": "Polygon", "coordinates": [[
+        [77.5945, 12.9715], [77.5945, 12.9815], [77.6045, 12.9815], [77.6045, 12.9715], [77.5945, 12.9715]
+    ]]},
+    "properties": {}
+}
+
+async def measure(results: list, name: str, call):
+    # Let background work from earlier calls finish before counting
+    await asyncio.sleep(0.05)
+    COUNTER.commands.clear()
+    try:
+        value = await call
+    except Exception as e:
+        # Older commits have bugs on some paths; count up to the failure
+        value = None
+        name = f"{name} [failed: {type(e).__name__}]"
+    results.append((name, sum(COUNTER.commands.values()), dict(COUNTER.commands)))
+    return value
+
+def endpoint_call(endpoint, **kwargs):
+    # Older routers take fewer parameters; pass only the ones they declare
+    parameters = inspect.signature(endpoint).parameters
+    return endpoint(**{name: value for name, value in kwargs.items() if name in parameters})
+
+async def scenario() -> list:
+    bike = await Database.db["bikes"].insert_one({"status": "available", "parked_zone_id": None})
+    user_id = str(ObjectId())
+    user = {"_id": user_id, "is_active": True, "is_admin": True}
+    results = []
+
+    await measure(results, "GeofencingService.create_zone", GeofencingService.create_zone(dict(ZONE)))
+
+    ride_data = RideCreate(user_id=user_id, source=Location(coordinates=POINT), destination=Location(coordinates=POINT))
+    ride = await measure(results, "POST /rides", rides_api.create_ride(ride_data, current_user=user))
+    await measure(results, "POST /rides/{id}/start", endpoint_call(
+        rides_api.start_ride, ride_id=ride["_id"],
+        data=RideStart(bike_id=str(bike.inserted_id), source_image_url="source.jpg"), current_user=user
+    ))
+    await measure(results, "POST /rides/{id}/complete", endpoint_call(
+        rides_api.complete_ride, ride_id=ride["_id"],
+        data=RideComplete(destination_coordinates=POINT, destination_image_url="dest.jpg"), current_user=user
+    ))
+    ride = await rides_api.create_ride(ride_data, current_user=user)
+    await measure(results, "POST /rides/{id}/cancel", endpoint_call(
+        rides_api.cancel_ride, ride_id=ride["_id"], current_user=user
+    ))
+
+    for method in (PaymentMethod.CASH, PaymentMethod.ONLINE):
+        payment = await measure(results, f"POST /payments ({method.value})", payments_api.create_payment(
+            PaymentCreate(ride_id=ride["_id"], user_id=user_id, amount=50.0, payment_method=method),
+            current_user=user
+        ))
+        if method == PaymentMethod.CASH:
+            call = endpoint_call(payments_api.complete_cash_payment, payment_id=payment["_id"], current_user=user)
+            name = "POST /payments/{id}/complete-cash"
+        else:
+            call = endpoint_call(
+                payments_api.process_online_payment, payment_id=payment["_id"],
+                data=PaymentProcess(payment_details={"gateway": "test"}), current_user=user
+            )
+            name = "POST /payments/{id}/process-online"
+        await measure(results, name, call)
+
+    penalty = await measure(results, "PenaltyService.create_penalty", PenaltyService.create_penalty(
+        user_id, ride["_id"], "invalid_parking", 100.0, "Benchmark"
+    ))
+    await measure(results, "PenaltyService.pay_penalty", PenaltyService.pay_penalty(penalty["_id"], str(ObjectId())))
+
+    # Let background work from completed rides settle before teardown
+    await asyncio.sleep(0.5)
+    return results
+
+async def run_mongod(url: str, db_name: str) -> list:
+    monitoring.register(COUNTER)
+    settings.MONGODB_URL = url
+    settings.MONGODB_DB_NAME = db_name
+    await Database.connect_to_mongo()
+    await Database.client.drop_database(db_name)
+    # Newer trees build indexes in the background after connecting
+    await asyncio.sleep(1)
+    try:
+        return await scenario()
+    finally:
+        await Database.client.drop_database(db_name)
+        await Database.close_mongo_connection()
+
+async def run_mongomock() -> list:
+    import mongomock
+
+    Database.db = MockDatabase(mongomock.MongoClient()["round_trips"])
+    return await scenario()
+
+def report(results: list):
+    width = max(len(name) for name, _, _ in results)
+    for name, total, commands in results:
+        detail = ", ".join(f"{command}={count}" for command, count in sorted(commands.items()))
+        print(f"{name:<{width}}  {total:>2}  ({detail})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=settings.MONGODB_URL)
+    parser.add_argument("--db", default=f"{settings.MONGODB_DB_NAME}_round_trips")
+    parser.add_argument("--mongomock", action="store_true", help="count against in-memory mongomock")
+    args = parser.parse_args()
+
+    # Distances come from the offline estimate so no external API is called
+    settings.GOOGLE_MAPS_API_KEY = ""
+    settings.DISTANCE_BACKEND = "google"
+    settings.GEOFENCE_BACKEND = "memory"
+    if args.mongomock:
+        results = asyncio.run(run_mongomock())
+    else:
+        results = asyncio.run(run_mongod(args.url, args.db))
+    report(results)
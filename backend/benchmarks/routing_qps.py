@@ -0,0 +1,91 @@
+"""
+Queries per second of the offline road graph on a synthetic city-sized
+network: a jittered street grid with some blocks removed. Run from the
+backend directory:
+
+    python -m benchmarks.routing_qps --size 400 --queries 200
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.geodesy import haversine_m
+from app.services.road_graph import RoadGraph
+
+ORIGIN_LNG, ORIGIN_LAT = 77.45, 12.85
+SPACING = 0.0005  # ~55 m between intersections
+
+def build_city(path: str, size: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    rows, cols = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+    jitter = rng.uniform(-0.2, 0.2, size=(size * size, 2)) * SPACING
+    coordinates = np.column_stack((
+        ORIGIN_LNG + cols.ravel() * SPACING,
+        ORIGIN_LAT + rows.ravel() * SPACING
+    )) + jitter
+
+    ids = rows * size + cols
+    edges = np.vstack((
+        np.column_stack((ids[:, :-1].ravel(), ids[:, 1:].ravel())),
+        np.column_stack((ids[:-1, :].ravel(), ids[1:, :].ravel()))
+    ))
+    # Drop some street segments so routes have to go around blocks
+    edges = edges[rng.random(len(edges)) > 0.1]
+    RoadGraph.build(path, coordinates, edges)
+
+def run(size: int, queries: int, max_trip_km: float):
+    random.seed(42)
+    path = tempfile.mkdtemp(prefix="road_graph_")
+
+    start = time.perf_counter()
+    build_city(path, size)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    graph = RoadGraph(path)
+    graph.nearest_node(ORIGIN_LNG, ORIGIN_LAT)
+    load_seconds = time.perf_counter() - start
+
+    # Typical rides: random origin, destination within max_trip_km
+    extent = size * SPACING
+    trips = []
+    while len(trips) < queries:
+        source = [ORIGIN_LNG + random.uniform(0, extent), ORIGIN_LAT + random.uniform(0, extent)]
+        dest = [source[0] + random.uniform(-1, 1) * max_trip_km / 111, source[1] + random.uniform(-1, 1) * max_trip_km / 111]
+        if 0 <= dest[0] - ORIGIN_LNG <= extent and 0 <= dest[1] - ORIGIN_LAT <= extent:
+            trips.append((source, dest))
+
+    latencies = []
+    unreachable = 0
+    detours = []
+    for source, dest in trips:
+        start = time.perf_counter()
+        meters = graph.distance_m(source, dest)
+        latencies.append(time.perf_counter() - start)
+        if meters is None:
+            unreachable += 1
+        else:
+            straight = haversine_m(source[0], source[1], dest[0], dest[1])
+            if straight > 0:
+                detours.append(meters / straight)
+
+    latencies.sort()
+    total = sum(latencies)
+    print(f"graph: {graph.node_count:,} nodes, {graph.edge_count:,} edges (build {build_seconds:.1f} s, load {load_seconds:.1f} s)")
+    print(f"queries={queries} max trip={max_trip_km} km unreachable={unreachable}")
+    print(f"throughput: {queries / total:,.1f} queries/s")
+    print(f"latency: mean {total / queries * 1000:.1f} ms, p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    if detours:
+        print(f"mean road/straight-line ratio: {sum(detours) / len(detours):.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=400, help="intersections per side")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-trip-km", type=float, default=3.0)
+    args = parser.parse_args()
+    run(args.size, args.queries, args.max_trip_km)
@@ -0,0 +1,81 @@
+# build_road_graph.py
+# Convert a GeoJSON road extract (e.g. exported from OSM with osmium or
+# ogr2ogr) into the memory-mapped graph format used by DISTANCE_BACKEND=graph:
+#
+#   python build_road_graph.py roads.geojson data/road_graph/driving
+#   python build_road_graph.py roads.geojson data/road_graph/walking --walking
+import argparse
+import json
+import numpy as np
+
+from app.core.geodesy import haversine_m_vec
+from app.services.road_graph import RoadGraph
+
+# Highway types bikes may not ride on, and ones pedestrians may not walk on
+NON_DRIVING_HIGHWAYS = {"footway", "pedestrian", "steps", "path", "bridleway", "corridor"}
+NON_WALKING_HIGHWAYS = {"motorway", "motorway_link", "trunk", "trunk_link"}
+
+def build(input_path: str, output_path: str, walking: bool = False, precision: int = 7):
+    with open(input_path) as f:
+        features = json.load(f)["features"]
+
+    excluded = NON_WALKING_HIGHWAYS if walking else NON_DRIVING_HIGHWAYS
+    node_ids = {}
+    coordinates = []
+    edges = []
+
+    def node_for(lng, lat):
+        # Ways share nodes wherever their vertices coincide
+        key = (round(lng, precision), round(lat, precision))
+        if key not in node_ids:
+            node_ids[key] = len(coordinates)
+            coordinates.append(key)
+        return node_ids[key]
+
+    for feature in features:
+        geometry = feature.get("geometry") or {}
+        properties = feature.get("properties") or {}
+        if properties.get("highway") in excluded:
+            continue
+
+        if geometry.get("type") == "LineString":
+            lines = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiLineString":
+            lines = geometry["coordinates"]
+        else:
+            continue
+
+        # OSM oneway=-1 (or reverse) means traffic runs against the way's direction
+        oneway = "no" if walking else str(properties.get("oneway", "no")).lower()
+        forward = oneway not in ("-1", "reverse")
+        backward = oneway not in ("yes", "true", "1")
+        for line in lines:
+            nodes = [node_for(point[0], point[1]) for point in line]
+            for a, b in zip(nodes, nodes[1:]):
+                if a == b:
+                    continue
+                if forward:
+                    edges.append((a, b))
+                if backward:
+                    edges.append((b, a))
+
+    if not edges:
+        raise SystemExit(f"❌ No routable roads found in {input_path}; nothing written")
+
+    nodes = np.asarray(coordinates, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.int64)
+    lengths = haversine_m_vec(
+        nodes[edges[:, 0], 0], nodes[edges[:, 0], 1],
+        nodes[edges[:, 1], 0], nodes[edges[:, 1], 1]
+    )
+    RoadGraph.build(output_path, nodes, edges, lengths, bidirectional=False)
+
+    print(f"✅ Road graph written to {output_path}: {len(nodes)} nodes, {len(edges)} edges")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a routing graph from a GeoJSON road extract")
+    parser.add_argument("input", help="GeoJSON FeatureCollection of road LineStrings")
+    parser.add_argument("output", help="Output graph directory")
+    parser.add_argument("--walking", action="store_true", help="Build a walking graph (ignores oneway)")
+    args = parser.parse_args()
+    build(args.input, args.output, walking=args.walking)
@@ -0,0 +1,117 @@
+# check_query_plans.py
+# Run explain() for the queries the services issue against a local mongod
+# and fail if any of them would scan a whole collection:
+#
+#   python check_query_plans.py
+#   python check_query_plans.py --url mongodb://localhost:27017 --db ev_bike_rental_plans
+#
+# The indexes declared in app/core/indexes.py are built first, so this also
+# catches a new query whose index was never declared.
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.indexes import IndexManager
+
+NOW = datetime.utcnow()
+USER_ID = str(ObjectId())
+BIKE_ID = str(ObjectId())
+
+# (description, collection, filter, sort) for each service query
+QUERIES = [
+    ("login / registration by email", "users", {"email": "user@example.com"}, None),
+    ("bulk import duplicate check", "users", {"email": {"$in": ["a@example.com", "b@example.com"]}}, None),
+    ("user's ride history", "rides", {"user_id": USER_ID}, [("created_at", -1), ("_id", -1)]),
+    ("bike's active ride", "rides", {"bike_id": BIKE_ID, "status": "active"}, None),
+    ("rides by status", "rides", {"status": "active"}, None),
+    ("user's payment history", "payments", {"user_id": USER_ID}, [("created_at", -1), ("_id", -1)]),
+    ("payments by status", "payments", {"status": "completed"}, None),
+    ("user's penalty history", "penalties", {"user_id": USER_ID}, [("created_at", -1), ("_id", -1)]),
+    ("penalties by status", "penalties", {"status": "pending"}, None),
+    ("bike's incidents", "incidents", {"bike_id": BIKE_ID}, [("created_at", -1)]),
+    ("bike's last zone event", "zone_events", {"bike_id": BIKE_ID}, [("created_at", -1)]),
+    (
+        "parking zone containing a point", "parking_zones",
+        {"geometry": {"$geoIntersects": {"$geometry": {"type": "Point", "coordinates": [77.6, 12.97]}}}},
+        None
+    ),
+    (
+        "job queue claim", "jobs",
+        {
+            "$or": [
+                {"status": "queued", "run_at": {"$lte": NOW}},
+                {"status": "running", "lease_expires_at": {"$lte": NOW}}
+            ],
+            "type": {"$in": ["digilocker.verify"]}
+        },
+        [("run_at", 1)]
+    ),
+    (
+        "job dedupe", "jobs",
+        {
+            "type": "digilocker.verify",
+            "user_id": USER_ID,
+            "dedupe_key": "pan_card:X:abc",
+            "$or": [
+                {"status": {"$in": ["queued", "running"]}},
+                {"status": "completed", "completed_at": {"$gte": NOW}}
+            ]
+        },
+        [("created_at", -1)]
+    ),
+    ("admin user list page", "users", {}, [("created_at", -1), ("_id", -1)]),
+    (
+        "admin ride list page after a cursor", "rides",
+        {"$and": [
+            {"status": "completed"},
+            {"$or": [{"created_at": {"$lt": NOW}}, {"created_at": NOW, "_id": {"$lt": ObjectId()}}]}
+        ]},
+        [("created_at", -1), ("_id", -1)]
+    ),
+    ("admin payment list by date", "payments", {"created_at": {"$gte": NOW}}, [("created_at", -1), ("_id", -1)]),
+    ("admin penalty list by status", "penalties", {"status": "pending"}, [("created_at", -1), ("_id", -1)]),
+    ("recent verification result", "jobs", {"dedupe_key": "pan_card:X:abc", "status": "completed"}, [("completed_at", -1)]),
+]
+
+def stages(plan):
+    """Every stage name in a (possibly nested) query plan"""
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from stages(child)
+
+async def check(url: str, db_name: str) -> int:
+    client = AsyncIOMotorClient(url)
+    db = client[db_name]
+    await IndexManager.ensure_indexes(db)
+
+    failures = 0
+    for description, collection, query, sort in QUERIES:
+        command = {"find": collection, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        explain = await db.command("explain", command, verbosity="queryPlanner")
+        plan = explain["queryPlanner"]["winningPlan"]
+        used = set(stages(plan))
+
+        if "COLLSCAN" in used:
+            failures += 1
+            print(f"❌ {description} ({collection}): COLLSCAN")
+        else:
+            print(f"✅ {description} ({collection}): {' > '.join(sorted(s for s in used if s))}")
+
+    client.close()
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that service queries are served by indexes")
+    parser.add_argument("--url", default=settings.MONGODB_URL)
+    parser.add_argument("--db", default=f"{settings.MONGODB_DB_NAME}_query_plans", help="Database to explain against")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(check(args.url, args.db)) else 0)
@@ -3,6 +3,45 @@ import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime
 from bson import ObjectId
+from app.core.indexes import IndexManager
+
+# Sample parking zones (using geospatial data)
+PARKING_ZONES = [
+    {
+        "name": "Central Park Zone",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [77.5945, 12.9715],
+                [77.5945, 12.9815],
+                [77.6045, 12.9815],
+                [77.6045, 12.9715],
+                [77.5945, 12.9715]
+            ]]
+        },
+        "properties": {
+            "capacity": 20,
+            "address": "Central Park Area"
+        }
+    },
+    {
+        "name": "Station Zone",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [77.6145, 12.9715],
+                [77.6145, 12.9815],
+                [77.6245, 12.9815],
+                [77.6245, 12.9715],
+                [77.6145, 12.9715]
+            ]]
+        },
+        "properties": {
+            "capacity": 15,
+            "address": "Near Train Station"
+        }
+    }
+]
 
 async def initialize_database():
     client = AsyncIOMotorClient("mongodb://localhost:27017")
@@ -36,44 +75,6 @@ async def initialize_database():
         "updated_at": datetime.utcnow()
     }
     
-    # Sample parking zones (using geospatial data)
-    parking_zones = [
-        {
-            "name": "Central Park Zone",
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [77.5945, 12.9715],
-                    [77.5945, 12.9815],
-                    [77.6045, 12.9815],
-                    [77.6045, 12.9715],
-                    [77.5945, 12.9715]
-                ]]
-            },
-            "properties": {
-                "capacity": 20,
-                "address": "Central Park Area"
-            }
-        },
-        {
-            "name": "Station Zone",
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [77.6145, 12.9715],
-                    [77.6145, 12.9815],
-                    [77.6245, 12.9815],
-                    [77.6245, 12.9715],
-                    [77.6145, 12.9715]
-                ]]
-            },
-            "properties": {
-                "capacity": 15,
-                "address": "Near Train Station"
-            }
-        }
-    ]
-    
     # Sample bikes
     bikes = [
         {
@@ -110,17 +111,15 @@ async def initialize_database():
     print("✅ Users created")
     
     # Parking zones
-    await db.parking_zones.insert_many(parking_zones)
+    await db.parking_zones.insert_many([dict(zone) for zone in PARKING_ZONES])
     print("✅ Parking zones created")
     
     # Bikes
     await db.bikes.insert_many(bikes)
     print("✅ Bikes created")
     
-    # Create necessary indexes
-    await db.users.create_index("email", unique=True)
-    await db.parking_zones.create_index([("geometry", "2dsphere")])
-    await db.bikes.create_index([("location", "2dsphere")])
+    # Create every index declared in app/core/indexes.py
+    await IndexManager.ensure_indexes(db)
     
     print("✅ All indexes created")
     print("Database initialization complete!")
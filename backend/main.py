@@ -11,8 +11,15 @@ from datetime import datetime
 
 from app.core.config import settings
 from app.core.database import Database
+from app.core.http_client import HTTPClient
+from app.core.security import PasswordHasher
 from app.mqtt.client import MQTTClient
 from app.mqtt.handlers import setup_mqtt_handlers
+from app.services.digilocker_service import DigiLockerService
+from app.services.job_queue import JobQueue
+from app.services.occupancy_service import OccupancyService
+from app.services.stats_service import StatsService
+from app.services.zone_index import ZoneIndex
 
 # Import API routers
 from app.api.auth.router import router as auth_router
@@ -65,6 +72,27 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 async def startup_db_client():
     await Database.connect_to_mongo()
     
+    # Open the pooled HTTP client used for external APIs
+    await HTTPClient.open()
+    
+    # Start the bcrypt worker pool so logins do not block the event loop
+    PasswordHasher.open()
+    
+    # Warm the parking zone index so the first geofence check is fast, and
+    # keep it in step with zones created by other workers
+    if settings.GEOFENCE_BACKEND == "memory":
+        await ZoneIndex.warm()
+        ZoneIndex.start_refresh()
+    
+    # Start the background workers for DigiLocker verification
+    JobQueue.register(DigiLockerService.VERIFY_JOB, DigiLockerService.run_verification_job)
+    await JobQueue.start()
+    
+    # Recount the dashboard and zone occupancy counters periodically to
+    # correct drift
+    await StatsService.start()
+    await OccupancyService.start()
+    
     # Connect to MQTT broker
     mqtt_client = MQTTClient()
     mqtt_client.connect()
@@ -77,7 +105,13 @@ async def startup_db_client():
 # Close database connection on shutdown
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await JobQueue.stop()
+    await StatsService.stop()
+    await OccupancyService.stop()
+    await ZoneIndex.stop_refresh()
     await Database.close_mongo_connection()
+    await HTTPClient.close()
+    PasswordHasher.close()
     
     # Disconnect from MQTT broker
     mqtt_client = MQTTClient()
@@ -122,6 +156,7 @@ async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None),
     )
 
 @app.exception_handler(RequestValidationError)